@@ -6,18 +6,34 @@ Uso:
     python scripts/transcribe_media.py
 
 Requisitos:
-    - pip install groq python-dotenv
+    - pip install groq python-dotenv tenacity
+    - Opcional: pip install pyarrow (checkpoint Parquet)
     - GROQ_API_KEY configurada no .env
 
 Comportamento:
     - Detecta arquivos de áudio/vídeo na pasta de mídia
     - Pula arquivos já transcritos (resume)
-    - Salva progresso a cada 10 arquivos
+    - Transcreve até TRANSCRIBE_CONCURRENCY arquivos em paralelo (default: 20)
+    - Respeita o rate limit da Groq (GROQ_RPM / GROQ_AUDIO_SECONDS_PM) com retry exponencial em 429
+    - TRANSCRIBE_BATCH=1: agrupa clipes curtos em uma única requisição (requer ffmpeg)
+    - Recomprime localmente (ffmpeg) arquivos > 25MB ou com sample rate > 16 kHz
+    - Registra cada transcrição concluída em um log append-only (resume seguro)
     - Gera: data/processed/{DATA_FOLDER}/transcriptions.csv
+      (+ transcriptions.parquet como checkpoint tipado, se pyarrow estiver instalado)
 """
 
 import os
+import re
+import csv
 import sys
+import time
+import shutil
+import asyncio
+import tempfile
+import subprocess
+import importlib.util
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -37,16 +53,141 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 # Arquivos de saída
 PROGRESS_FILE = OUTPUT_DIR / 'transcriptions_progress.csv'
 COMPLETE_FILE = OUTPUT_DIR / 'transcriptions.csv'
+CHECKPOINT_FILE = COMPLETE_FILE.with_suffix('.parquet')
+RECOMPRESS_DIR = OUTPUT_DIR / 'media_recompressed'
+
+# Colunas do log de progresso (uma linha por arquivo processado)
+PROGRESS_FIELDS = ['file_path', 'transcription', 'transcription_status',
+                   'transcription_language', 'error_message',
+                   'batch_id', 'batch_offset']
+
+# Colunas do transcriptions.csv final
+OUTPUT_FIELDS = ['file_path', 'full_path', 'media_type', 'size_mb',
+                 'transcription', 'transcription_status', 'transcription_language',
+                 'transcription_confidence', 'is_synthetic', 'error_message',
+                 'batch_id', 'batch_offset']
+
+# Tipos das colunas numéricas do log (o CSV devolve tudo como texto)
+PROGRESS_TYPES = {'batch_id': int, 'batch_offset': float}
 
 # API Key (obrigatória no .env)
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 
+# Requisições simultâneas à API (limitadas pelo rate limit da Groq)
+MAX_CONCURRENCY = int(os.getenv('TRANSCRIBE_CONCURRENCY', '20'))
+
+# Rate limit da Groq para Whisper (free tier: 20 RPM, 7.200 s de áudio/hora)
+RATE_LIMIT_RPM = int(os.getenv('GROQ_RPM', '20'))
+RATE_LIMIT_AUDIO_SECONDS_PM = int(os.getenv('GROQ_AUDIO_SECONDS_PM', '120'))
+
+# Estimativa de duração pelo tamanho (voice notes Opus ~16 kbps ≈ 2 KB/s)
+ESTIMATED_BYTES_PER_SECOND = 2000
+# A Groq cobra no mínimo 10 s de áudio por requisição
+MIN_BILLED_SECONDS = 10
+
+# Limite de upload da API
+MAX_UPLOAD_MB = 25
+
+# Preflight: Whisper trabalha em 16 kHz mono; acima disso é só upload a mais
+TARGET_SAMPLE_RATE = 16000
+PREFLIGHT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Batching de clipes curtos (opt-in): N voice notes → 1 requisição
+BATCH_ENABLED = os.getenv('TRANSCRIBE_BATCH', '0') == '1'
+BATCH_CLIP_MAX_MB = 0.25       # só clipes pequenos (~2 min de Opus) entram em lote
+BATCH_MAX_MB = 24              # soma dos clipes por lote (limite da API: 25MB)
+BATCH_MAX_CLIPS = 20
+BATCH_GAP_SECONDS = 1.0        # silêncio inserido entre clipes
+
 # Formatos suportados
-SUPPORTED_FORMATS = ['.opus', '.mp3', '.wav', '.mp4', '.m4a', '.webm', '.mpeg', '.mpga']
+SUPPORTED_FORMATS = frozenset({'.opus', '.mp3', '.wav', '.mp4', '.m4a', '.webm', '.mpeg', '.mpga'})
+
+# Content-Type enviado no upload multipart
+MIME_TYPES = {
+    '.opus': 'audio/ogg',
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+    '.mp4': 'video/mp4',
+    '.m4a': 'audio/mp4',
+    '.webm': 'audio/webm',
+    '.mpeg': 'audio/mpeg',
+    '.mpga': 'audio/mpeg',
+}
+
+
+class RateLimiter:
+    """
+    Token bucket duplo: requisições/minuto e segundos de áudio/minuto.
+    
+    Cada `acquire()` espera até haver saldo nos dois buckets. Após cada
+    chamada, `update_from_headers()` lê os headers `x-ratelimit-*` da Groq
+    e, se a cota remota zerar, bloqueia novos envios até o reset.
+    """
+    
+    def __init__(self, requests_per_minute: int, audio_seconds_per_minute: int):
+        self.capacity = {'requests': float(requests_per_minute),
+                         'seconds': float(audio_seconds_per_minute)}
+        self.tokens = dict(self.capacity)
+        self.last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._open = asyncio.Event()
+        self._open.set()
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        for key, cap in self.capacity.items():
+            self.tokens[key] = min(cap, self.tokens[key] + elapsed * cap / 60)
+    
+    async def acquire(self, n_requests: int = 1, n_seconds: float = 0):
+        """Aguarda saldo para `n_requests` requisições e `n_seconds` de áudio."""
+        needed = {'requests': min(n_requests, self.capacity['requests']),
+                  'seconds': min(n_seconds, self.capacity['seconds'])}
+        
+        async with self._lock:
+            while True:
+                await self._open.wait()
+                self._refill()
+                
+                missing = {k: needed[k] - self.tokens[k] for k in needed}
+                if all(m <= 0 for m in missing.values()):
+                    for k in needed:
+                        self.tokens[k] -= needed[k]
+                    return
+                
+                wait = max(m * 60 / self.capacity[k] for k, m in missing.items() if m > 0)
+                await asyncio.sleep(wait)
+    
+    def update_from_headers(self, headers):
+        """Ajusta o bucket de requisições pelos headers de rate limit da resposta."""
+        remaining = headers.get('x-ratelimit-remaining-requests')
+        if remaining is None:
+            return
+        
+        remaining = float(remaining)
+        self.tokens['requests'] = min(self.tokens['requests'], remaining)
+        
+        if remaining < 1 and self._open.is_set():
+            reset = _parse_reset(headers.get('x-ratelimit-reset-requests', '60s'))
+            self._open.clear()
+            asyncio.get_running_loop().call_later(reset, self._open.set)
+
+
+def _parse_reset(value: str) -> float:
+    """Converte durações da Groq ('2m59.56s', '7.66s', '120ms') em segundos."""
+    units = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+    parts = re.findall(r'([\d.]+)(ms|h|m|s)', value)
+    return sum(float(n) * units[u] for n, u in parts) if parts else 60.0
+
+
+def estimate_audio_seconds(file_path: Path) -> float:
+    """Estima a duração cobrada do áudio a partir do tamanho do arquivo."""
+    return max(MIN_BILLED_SECONDS, file_path.stat().st_size / ESTIMATED_BYTES_PER_SECOND)
 
 
-def setup_groq():
-    """Configura cliente Groq."""
+async def setup_groq():
+    """Configura cliente Groq assíncrono."""
     if not GROQ_API_KEY:
         print("❌ GROQ_API_KEY não configurada!")
         print()
@@ -57,16 +198,23 @@ def setup_groq():
         sys.exit(1)
     
     try:
-        from groq import Groq
+        from groq import AsyncGroq
     except ImportError:
         print("❌ Groq não instalado. Execute: pip install groq")
         sys.exit(1)
     
-    client = Groq(api_key=GROQ_API_KEY)
+    # Só confere a presença: o tenacity é importado em _request_transcription
+    if importlib.util.find_spec('tenacity') is None:
+        print("❌ Tenacity não instalado. Execute: pip install tenacity")
+        sys.exit(1)
+    
+    # Retentativas ficam a cargo do tenacity (ver _request_transcription): 429,
+    # falha de conexão, timeout e 5xx, todas passando pelo rate limiter
+    client = AsyncGroq(api_key=GROQ_API_KEY, max_retries=0)
     
     # Teste rápido
     try:
-        test = client.chat.completions.create(
+        test = await client.chat.completions.create(
             messages=[{"role": "user", "content": "Diga apenas: OK"}],
             model="llama-3.3-70b-versatile",
             max_tokens=10
@@ -86,99 +234,529 @@ def scan_media_files(media_dir: Path) -> list:
         print(f"❌ Diretório não encontrado: {media_dir}")
         return files
     
-    for file_path in media_dir.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_FORMATS:
+    # scandir: o DirEntry já traz tipo/stat da leitura do diretório
+    with os.scandir(media_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in SUPPORTED_FORMATS:
+                continue
+            
             # Extrai tipo do nome (AUDIO, VIDEO)
-            parts = file_path.name.split('-')
+            parts = entry.name.split('-')
             media_type = parts[1].lower() if len(parts) >= 2 else 'unknown'
             
             files.append({
-                'file_path': file_path.name,
-                'full_path': str(file_path),
+                'file_path': entry.name,
+                'full_path': entry.path,
                 'media_type': media_type,
-                'size_mb': file_path.stat().st_size / (1024 * 1024)
+                'size_mb': entry.stat().st_size / (1024 * 1024)
             })
     
     return files
 
 
-def transcribe_audio(client, file_path: Path) -> dict:
+def _error_result(message: str) -> dict:
+    return {
+        'transcription': '',
+        'transcription_status': 'error',
+        'transcription_language': None,
+        'error_message': message,
+        'batch_id': None,
+        'batch_offset': None
+    }
+
+
+async def _request_transcription(client, limiter: RateLimiter, file_path: Path,
+                                 audio_seconds: float):
+    """
+    Envia um arquivo à API respeitando o rate limit.
+    
+    Backoff exponencial em 429 e nas falhas transitórias que o SDK retentaria
+    sozinho (conexão, timeout, 5xx); o cliente é criado com max_retries=0.
+    """
+    from groq import (APIConnectionError, APITimeoutError, InternalServerError,
+                      RateLimitError)
+    from tenacity import (AsyncRetrying, retry_if_exception_type,
+                          stop_after_attempt, wait_random_exponential)
+    
+    async for attempt in AsyncRetrying(
+        wait=wait_random_exponential(multiplier=1, max=60),
+        stop=stop_after_attempt(5),
+        retry=retry_if_exception_type(
+            (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+        ),
+        reraise=True
+    ):
+        with attempt:
+            await limiter.acquire(n_requests=1, n_seconds=audio_seconds)
+            
+            # Passa o handle aberto: o httpx faz upload em streaming
+            # (Content-Length via fstat) sem carregar o arquivo em memória
+            mime_type = MIME_TYPES.get(file_path.suffix.lower(), 'application/octet-stream')
+            with open(file_path, 'rb') as audio_file:
+                response = await client.audio.transcriptions.with_raw_response.create(
+                    file=(file_path.name, audio_file, mime_type),
+                    model="whisper-large-v3",
+                    language="pt",
+                    response_format="verbose_json",
+                    temperature=0.0
+                )
+            
+            limiter.update_from_headers(response.headers)
+            return await response.parse()
+
+
+async def transcribe_audio(client, limiter: RateLimiter, file_path: Path) -> dict:
     """Transcreve um arquivo de áudio/vídeo."""
     try:
         if not file_path.exists():
-            return {
-                'transcription': '',
-                'transcription_status': 'error',
-                'transcription_language': None,
-                'error_message': 'Arquivo não encontrado'
-            }
+            return _error_result('Arquivo não encontrado')
         
         # Verifica tamanho (limite: 25MB)
         file_size_mb = file_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > 25:
-            return {
-                'transcription': '',
-                'transcription_status': 'error',
-                'transcription_language': None,
-                'error_message': f'Arquivo muito grande: {file_size_mb:.1f}MB (max 25MB)'
-            }
+        if file_size_mb > MAX_UPLOAD_MB:
+            return _error_result(f'Arquivo muito grande: {file_size_mb:.1f}MB (max {MAX_UPLOAD_MB}MB)')
         
-        # Transcreve
-        with open(file_path, 'rb') as audio_file:
-            result = client.audio.transcriptions.create(
-                file=(file_path.name, audio_file.read()),
-                model="whisper-large-v3",
-                language="pt",
-                response_format="verbose_json",
-                temperature=0.0
-            )
+        result = await _request_transcription(
+            client, limiter, file_path, estimate_audio_seconds(file_path)
+        )
         
         return {
             'transcription': result.text.strip(),
             'transcription_status': 'completed',
             'transcription_language': getattr(result, 'language', 'pt'),
-            'error_message': None
+            'error_message': None,
+            'batch_id': None,
+            'batch_offset': None
         }
     
     except Exception as e:
-        return {
-            'transcription': '',
-            'transcription_status': 'error',
-            'transcription_language': None,
-            'error_message': str(e)
-        }
+        return _error_result(str(e))
+
+
+# =============================================================================
+# PREFLIGHT (RECOMPRESSÃO LOCAL)
+# Arquivos grandes demais para a API ou com sample rate acima do que o
+# Whisper usa são convertidos para Opus mono 16 kHz antes do upload.
+# =============================================================================
+
+def probe_sample_rate(file_path: Path) -> int:
+    """Sample rate do primeiro stream de áudio (0 se não houver)."""
+    out = subprocess.run(
+        ['ffprobe', '-v', 'error', '-select_streams', 'a:0', '-show_entries', 'stream=sample_rate',
+         '-of', 'csv=p=0', str(file_path)],
+        check=True, capture_output=True, text=True
+    ).stdout.strip()
+    return int(out) if out.isdigit() else 0
+
+
+def maybe_recompress(file_path: Path) -> Path:
+    """
+    Recomprime o arquivo se passar do limite da API ou tiver sample rate > 16 kHz.
+    
+    O resultado fica em cache em RECOMPRESS_DIR (reaproveitado no resume).
+    
+    Returns:
+        Path a ser enviado para a API (original ou recomprimido)
+    """
+    size = file_path.stat().st_size
+    oversize = size > MAX_UPLOAD_MB * 1024 * 1024
+    
+    if not oversize and probe_sample_rate(file_path) <= TARGET_SAMPLE_RATE:
+        return file_path
+    
+    out_path = RECOMPRESS_DIR / f'{file_path.name}.opus'
+    if not out_path.exists() or out_path.stat().st_mtime < file_path.stat().st_mtime:
+        RECOMPRESS_DIR.mkdir(parents=True, exist_ok=True)
+        subprocess.run(
+            ['ffmpeg', '-y', '-v', 'error', '-i', str(file_path), '-vn', '-ac', '1',
+             '-ar', str(TARGET_SAMPLE_RATE), '-c:a', 'libopus', '-b:a', '24k', str(out_path)],
+            check=True, capture_output=True
+        )
+    
+    # Só usa a versão recomprimida se ela de fato ajuda
+    if not oversize and out_path.stat().st_size >= size:
+        return file_path
+    return out_path
+
+
+async def preflight_media(records: list) -> dict:
+    """
+    Roda maybe_recompress em paralelo (ProcessPoolExecutor) antes das transcrições.
+    
+    Voice notes Opus abaixo do limite já estão no formato ideal e são puladas
+    sem nem chamar o ffprobe.
+    
+    Returns:
+        Dict file_path → Path de upload (só para arquivos recomprimidos)
+    """
+    candidates = [
+        r['file_path'] for r in records
+        if float(r['size_mb']) > MAX_UPLOAD_MB or not r['file_path'].lower().endswith('.opus')
+    ]
+    if not candidates:
+        return {}
+    
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=PREFLIGHT_WORKERS) as pool:
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, maybe_recompress, MEDIA_DIR / name) for name in candidates),
+            return_exceptions=True
+        )
+    
+    upload_paths = {}
+    for name, result in zip(candidates, results):
+        if isinstance(result, Exception):
+            # Segue com o original; transcribe_audio reporta o erro se houver
+            print(f"   ⚠️  Preflight falhou para {name[:50]}: {result}")
+        elif result != MEDIA_DIR / name:
+            upload_paths[name] = result
+    
+    return upload_paths
+
+
+# =============================================================================
+# BATCHING DE CLIPES CURTOS
+# Concatena voice notes curtas (com silêncio entre elas) em um único arquivo,
+# transcreve uma vez e redistribui os segmentos pelo offset de cada clipe.
+# =============================================================================
+
+def plan_batches(pending: list) -> tuple:
+    """
+    Separa pendentes em lotes de clipes curtos e arquivos individuais.
+    
+    Args:
+        pending: Lista de registros pendentes (dicts com file_path e size_mb)
+    
+    Returns:
+        Tuple (lista de lotes [lista de file_path], lista de file_path individuais)
+    """
+    singles = []
+    batches = []
+    current, current_mb = [], 0.0
+    for record in pending:
+        file_name, size_mb = record['file_path'], float(record['size_mb'])
+        if size_mb > BATCH_CLIP_MAX_MB:
+            singles.append(file_name)
+            continue
+        if current and (current_mb + size_mb >= BATCH_MAX_MB or len(current) >= BATCH_MAX_CLIPS):
+            batches.append(current)
+            current, current_mb = [], 0.0
+        current.append(file_name)
+        current_mb += size_mb
+    if current:
+        batches.append(current)
+    
+    # Lote de um clipe só não compensa o custo do ffmpeg
+    singles += [b[0] for b in batches if len(b) == 1]
+    batches = [b for b in batches if len(b) > 1]
+    
+    return batches, singles
+
+
+async def _run_tool(*args) -> str:
+    """Executa ffmpeg/ffprobe sem bloquear o event loop."""
+    proc = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"{args[0]} falhou: {stderr.decode(errors='replace')[-300:]}")
+    return stdout.decode()
+
+
+async def probe_duration(file_path: Path) -> float:
+    """Duração do arquivo em segundos (via ffprobe)."""
+    out = await _run_tool('ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                          '-of', 'csv=p=0', str(file_path))
+    return float(out.strip())
+
+
+async def build_batch_audio(file_paths: list, output_path: Path) -> list:
+    """
+    Concatena os clipes em um único Opus mono 16 kHz, com silêncio entre eles.
+    
+    Returns:
+        Lista de offsets (segundos) do início de cada clipe no arquivo gerado
+    """
+    durations = [await probe_duration(fp) for fp in file_paths]
+    
+    offsets, position = [], 0.0
+    for duration in durations:
+        offsets.append(position)
+        position += duration + BATCH_GAP_SECONDS
+    
+    inputs = [arg for fp in file_paths for arg in ('-i', str(fp))]
+    pads = ';'.join(
+        f'[{i}:a:0]aresample=16000,aformat=channel_layouts=mono,'
+        f'apad=pad_dur={BATCH_GAP_SECONDS}[a{i}]'
+        for i in range(len(file_paths))
+    )
+    labels = ''.join(f'[a{i}]' for i in range(len(file_paths)))
+    graph = f'{pads};{labels}concat=n={len(file_paths)}:v=0:a=1[out]'
+    
+    await _run_tool('ffmpeg', '-y', '-v', 'error', *inputs, '-filter_complex', graph,
+                    '-map', '[out]', '-c:a', 'libopus', '-b:a', '24k', str(output_path))
+    
+    return offsets
+
+
+def split_segments(segments: list, offsets: list) -> list:
+    """
+    Distribui os segmentos entre os clipes pelo ponto médio de cada segmento.
+    
+    Um segmento que atravessa o início de um clipe não pode ser atribuído a
+    nenhum dos dois lados com segurança: os clipes envolvidos ficam como None,
+    assim como clipes que terminam sem nenhum segmento.
+    
+    Returns:
+        Lista com o texto de cada clipe, ou None quando a divisão falhou
+    """
+    texts = [[] for _ in offsets]
+    failed = set()
+    
+    for seg in segments or []:
+        get = seg.get if isinstance(seg, dict) else lambda k: getattr(seg, k)
+        start, end = get('start'), get('end')
+        middle = (start + end) / 2
+        
+        # Último clipe cujo offset é <= ponto médio
+        clip = max(i for i, off in enumerate(offsets) if off <= middle) if middle >= offsets[0] else 0
+        texts[clip].append(get('text').strip())
+        
+        # Segmento cruzando a fronteira entre clipes
+        crossed = [i for i, off in enumerate(offsets) if start < off < end]
+        if crossed:
+            failed.update(crossed)
+            failed.update(i - 1 for i in crossed if i > 0)
+    
+    return [
+        None if i in failed or not parts else ' '.join(t for t in parts if t)
+        for i, parts in enumerate(texts)
+    ]
+
+
+async def transcribe_batch(client, limiter: RateLimiter, file_paths: list, batch_id: int) -> list:
+    """
+    Transcreve um lote de clipes curtos com uma única requisição.
+    
+    Se o lote falhar (ffmpeg, API ou resposta sem segmentos), cada clipe é
+    transcrito individualmente. O mesmo vale para clipes cuja divisão dos
+    segmentos falhou (segmento cruzando a fronteira ou clipe sem segmentos).
+    
+    Returns:
+        Lista de dicts de resultado, na ordem de `file_paths`
+    """
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            batch_path = Path(tmp) / f'batch_{batch_id:05d}.opus'
+            offsets = await build_batch_audio(file_paths, batch_path)
+            audio_seconds = offsets[-1] + (await probe_duration(file_paths[-1]))
+            
+            result = await _request_transcription(client, limiter, batch_path, audio_seconds)
+        
+        segments = getattr(result, 'segments', None)
+        if not segments:
+            raise ValueError('resposta sem segmentos')
+        
+        texts = split_segments(segments, offsets)
+    
+    except Exception as e:
+        print(f"   ⚠️  Lote {batch_id} falhou ({e}); transcrevendo {len(file_paths)} clipes individualmente")
+        return [await transcribe_audio(client, limiter, fp) for fp in file_paths]
+    
+    failed = sum(text is None for text in texts)
+    if failed:
+        print(f"   ⚠️  Lote {batch_id}: {failed} clipes sem divisão segura; transcrevendo individualmente")
+    
+    language = getattr(result, 'language', 'pt')
+    results = []
+    for fp, text, offset in zip(file_paths, texts, offsets):
+        if text is None:
+            results.append(await transcribe_audio(client, limiter, fp))
+            continue
+        results.append({
+            'transcription': text,
+            'transcription_status': 'completed',
+            'transcription_language': language,
+            'error_message': None,
+            'batch_id': batch_id,
+            'batch_offset': round(offset, 3)
+        })
+    return results
 
 
-def load_or_create_dataframe(media_files: list):
-    """Carrega progresso existente ou cria novo DataFrame."""
-    import pandas as pd
+def load_or_create_records(media_files: list) -> tuple:
+    """
+    Carrega progresso existente ou cria nova base de transcrições.
+    
+    Returns:
+        Tuple (records, status_index, is_complete) — records é uma lista de
+        dicts (uma linha do CSV cada) e status_index mapeia file_path → posição
+    """
+    # Prioridade: checkpoint parquet > complete > progress > novo
+    records = load_checkpoint()
+    if records is not None:
+        print(f"✅ Encontrado checkpoint COMPLETO: {CHECKPOINT_FILE.name}")
+        return records, {r['file_path']: i for i, r in enumerate(records)}, True
     
-    # Prioridade: complete > progress > novo
     if COMPLETE_FILE.exists():
         print(f"✅ Encontrado arquivo COMPLETO: {COMPLETE_FILE.name}")
-        return pd.read_csv(COMPLETE_FILE), True
+        with open(COMPLETE_FILE, 'r', encoding='utf-8', newline='') as f:
+            records = list(csv.DictReader(f))
+        return records, {r['file_path']: i for i, r in enumerate(records)}, True
+    
+    records = [
+        {
+            **media,
+            'transcription': None,
+            'transcription_status': 'pending',
+            'transcription_language': None,
+            'transcription_confidence': None,
+            'is_synthetic': False,
+            'error_message': None,
+            'batch_id': None,
+            'batch_offset': None
+        }
+        for media in media_files
+    ]
+    status_index = {r['file_path']: i for i, r in enumerate(records)}
     
     if PROGRESS_FILE.exists():
         print(f"⚠️  Encontrado arquivo de PROGRESSO: {PROGRESS_FILE.name}")
-        return pd.read_csv(PROGRESS_FILE), False
+        
+        # Log append-only: última linha de cada arquivo prevalece
+        with open(PROGRESS_FILE, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                idx = status_index.get(row.get('file_path'))
+                if idx is None:
+                    continue
+                records[idx].update(
+                    (k, PROGRESS_TYPES.get(k, str)(row[k]) if row[k] else None)
+                    for k in PROGRESS_FIELDS[1:] if k in row
+                )
+                records[idx]['transcription_status'] = row.get('transcription_status') or 'pending'
+        
+        return records, status_index, False
     
     # Cria novo
     print("🆕 Criando nova base de transcrições...")
-    df = pd.DataFrame(media_files)
-    df['transcription'] = None
-    df['transcription_status'] = 'pending'
-    df['transcription_language'] = None
-    df['transcription_confidence'] = None
-    df['is_synthetic'] = False
-    df['error_message'] = None
+    return records, status_index, False
+
+
+def open_progress_log(records: list):
+    """
+    Abre o log de progresso em modo append.
+    
+    Se o log não existe ou está no formato antigo (snapshot completo do
+    DataFrame), é reescrito uma única vez com as linhas já processadas.
+    
+    Returns:
+        Tuple (file handle, csv.DictWriter)
+    """
+    header_ok = False
+    if PROGRESS_FILE.exists():
+        with open(PROGRESS_FILE, 'r', encoding='utf-8', newline='') as f:
+            header_ok = next(csv.reader(f), None) == PROGRESS_FIELDS
+    
+    if header_ok:
+        log_file = open(PROGRESS_FILE, 'a', encoding='utf-8', newline='')
+        return log_file, csv.DictWriter(log_file, fieldnames=PROGRESS_FIELDS, extrasaction='ignore')
     
-    return df, False
+    log_file = open(PROGRESS_FILE, 'w', encoding='utf-8', newline='')
+    writer = csv.DictWriter(log_file, fieldnames=PROGRESS_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(r for r in records if r['transcription_status'] != 'pending')
+    log_file.flush()
+    
+    return log_file, writer
 
 
-def main():
-    """Executa pipeline de transcrição."""
-    import pandas as pd
+def save_records(records: list, path: Path):
+    """Grava a base de transcrições em CSV."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def _checkpoint_schema():
+    import pyarrow as pa
     
+    return pa.schema([
+        ('file_path', pa.string()),
+        ('full_path', pa.string()),
+        ('media_type', pa.string()),
+        ('size_mb', pa.float64()),
+        ('transcription', pa.string()),
+        ('transcription_status', pa.string()),
+        ('transcription_language', pa.string()),
+        ('transcription_confidence', pa.float64()),
+        ('is_synthetic', pa.bool_()),
+        ('error_message', pa.string()),
+        ('batch_id', pa.int64()),
+        ('batch_offset', pa.float64()),
+    ])
+
+
+def save_checkpoint(records: list) -> bool:
+    """
+    Grava a base de transcrições em Parquet (zstd), tipada e colunar.
+    
+    O CSV continua sendo o formato lido pelo notebook de wrangling; o
+    Parquet só acelera a carga em execuções seguintes.
+    
+    Returns:
+        True se o checkpoint foi gravado (False se pyarrow não está instalado)
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+    
+    table = pa.Table.from_pylist(records, schema=_checkpoint_schema())
+    pq.write_table(table, CHECKPOINT_FILE, compression='zstd')
+    return True
+
+
+def load_checkpoint():
+    """
+    Carrega o checkpoint Parquet, se existir e estiver em dia com o CSV.
+    
+    Returns:
+        Lista de registros ou None (sem checkpoint/pyarrow, ou CSV mais novo)
+    """
+    if not CHECKPOINT_FILE.exists():
+        return None
+    
+    # CSV editado/regerado depois do checkpoint prevalece
+    if COMPLETE_FILE.exists() and COMPLETE_FILE.stat().st_mtime > CHECKPOINT_FILE.stat().st_mtime:
+        return None
+    
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    
+    return pq.read_table(CHECKPOINT_FILE).to_pylist()
+
+
+async def _bounded(sem: asyncio.Semaphore, file_names: list, coro):
+    """
+    Executa a corotina respeitando o limite de concorrência.
+    
+    Returns:
+        Lista de pares (file_path, resultado) — um por arquivo da tarefa
+    """
+    async with sem:
+        results = await coro
+    if isinstance(results, dict):
+        results = [results]
+    return list(zip(file_names, results))
+
+
+async def main():
+    """Executa pipeline de transcrição."""
     print()
     print("=" * 70)
     print("🎙️  TRANSCRIÇÃO DE MÍDIAS DO WHATSAPP")
@@ -191,7 +769,7 @@ def main():
     print()
     
     # Setup API
-    client = setup_groq()
+    client = await setup_groq()
     print()
     
     # Escaneia arquivos
@@ -204,13 +782,14 @@ def main():
     
     print(f"   Encontrados: {len(media_files)} arquivos")
     
-    # Carrega ou cria DataFrame
-    df, is_complete = load_or_create_dataframe(media_files)
+    # Carrega ou cria base de transcrições
+    records, status_index, is_complete = load_or_create_records(media_files)
     
-    # Status atual
-    completed = (df['transcription_status'] == 'completed').sum()
-    errors = (df['transcription_status'] == 'error').sum()
-    pending = (df['transcription_status'] == 'pending').sum()
+    # Status atual (uma única passada pelos registros)
+    status_counts = Counter(r['transcription_status'] for r in records)
+    completed = status_counts['completed']
+    errors = status_counts['error']
+    pending = status_counts['pending']
     
     print()
     print("📊 Status atual:")
@@ -226,6 +805,7 @@ def main():
         print()
         print("Para reprocessar, delete os arquivos:")
         print(f"   - {COMPLETE_FILE}")
+        print(f"   - {CHECKPOINT_FILE}")
         print(f"   - {PROGRESS_FILE}")
         print("=" * 70)
         return
@@ -233,44 +813,91 @@ def main():
     # Processa pendentes
     print("=" * 70)
     print("🎙️  INICIANDO PROCESSAMENTO")
-    print(f"   Estimativa: ~{pending * 3 // 60} minutos")
+    print(f"   Concorrência: {MAX_CONCURRENCY} requisições simultâneas")
+    print(f"   Rate limit: {RATE_LIMIT_RPM} req/min, {RATE_LIMIT_AUDIO_SECONDS_PM} s de áudio/min")
+    estimate_s = max(pending * 3 // MAX_CONCURRENCY, pending * 60 // RATE_LIMIT_RPM)
+    print(f"   Estimativa: ~{estimate_s // 60} minutos")
     print("=" * 70)
     print()
     
-    df_pending = df[df['transcription_status'] == 'pending']
+    pending_records = [r for r in records if r['transcription_status'] == 'pending']
     processed = 0
     start_time = datetime.now()
     
-    for idx in df_pending.index:
-        row = df.loc[idx]
-        file_path = MEDIA_DIR / row['file_path']
-        
-        # Transcreve
-        result = transcribe_audio(client, file_path)
-        
-        # Atualiza DataFrame
-        df.at[idx, 'transcription'] = result['transcription']
-        df.at[idx, 'transcription_status'] = result['transcription_status']
-        df.at[idx, 'transcription_language'] = result['transcription_language']
-        df.at[idx, 'error_message'] = result['error_message']
-        
-        processed += 1
-        
-        # Progress bar simples
-        pct = processed / pending * 100
-        status = "✅" if result['transcription_status'] == 'completed' else "❌"
-        print(f"   [{processed:3d}/{pending}] {pct:5.1f}% {status} {row['file_path'][:50]}")
-        
-        # Salva a cada 10
-        if processed % 10 == 0:
-            df.to_csv(PROGRESS_FILE, index=False)
-            elapsed = (datetime.now() - start_time).seconds
-            rate = processed / elapsed if elapsed > 0 else 0
-            remaining = (pending - processed) / rate if rate > 0 else 0
-            print(f"   💾 Progresso salvo | ⏱️  ~{remaining/60:.0f} min restantes")
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    limiter = RateLimiter(RATE_LIMIT_RPM, RATE_LIMIT_AUDIO_SECONDS_PM)
+    
+    has_ffmpeg = bool(shutil.which('ffmpeg') and shutil.which('ffprobe'))
+    
+    if has_ffmpeg:
+        upload_paths = await preflight_media(pending_records)
+        if upload_paths:
+            print(f"   🗜️  {len(upload_paths)} arquivos recomprimidos para upload")
+    else:
+        print("   ⚠️  ffmpeg/ffprobe não encontrados: preflight desativado")
+        upload_paths = {}
+    
+    def upload_path(file_name):
+        return upload_paths.get(file_name, MEDIA_DIR / file_name)
+    
+    # Numeração dos lotes continua a da execução anterior (resume)
+    last_batch_id = max((r['batch_id'] for r in records if r['batch_id']), default=0)
+    
+    if BATCH_ENABLED and has_ffmpeg:
+        batches, singles = plan_batches(pending_records)
+        print(f"   📦 {len(batches)} lotes ({sum(map(len, batches))} clipes curtos) + {len(singles)} individuais")
+    else:
+        if BATCH_ENABLED:
+            print("   ⚠️  ffmpeg/ffprobe não encontrados: batching desativado")
+        batches, singles = [], [r['file_path'] for r in pending_records]
+    
+    tasks = [
+        asyncio.create_task(
+            _bounded(sem, batch, transcribe_batch(
+                client, limiter, [upload_path(f) for f in batch], batch_id
+            ))
+        )
+        for batch_id, batch in enumerate(batches, last_batch_id + 1)
+    ] + [
+        asyncio.create_task(
+            _bounded(sem, [file_name], transcribe_audio(client, limiter, upload_path(file_name)))
+        )
+        for file_name in singles
+    ]
+    
+    log_file, log_writer = open_progress_log(records)
+    
+    # Atualiza à medida que cada transcrição termina (ordem de conclusão)
+    try:
+        for task in asyncio.as_completed(tasks):
+            for file_name, result in await task:
+                record = records[status_index[file_name]]
+                record.update(result)
+                
+                # Persiste só a linha nova (O(1) por arquivo)
+                log_writer.writerow(record)
+                log_file.flush()
+                os.fsync(log_file.fileno())
+                
+                processed += 1
+                
+                # Progress bar simples
+                pct = processed / pending * 100
+                status = "✅" if result['transcription_status'] == 'completed' else "❌"
+                print(f"   [{processed:3d}/{pending}] {pct:5.1f}% {status} {file_name[:50]}")
+                
+                # Estimativa a cada 10
+                if processed % 10 == 0:
+                    elapsed = (datetime.now() - start_time).seconds
+                    rate = processed / elapsed if elapsed > 0 else 0
+                    remaining = (pending - processed) / rate if rate > 0 else 0
+                    print(f"   💾 Progresso salvo | ⏱️  ~{remaining/60:.0f} min restantes")
+    finally:
+        log_file.close()
     
-    # Salva versão final
-    df.to_csv(COMPLETE_FILE, index=False)
+    # Salva versão final (CSV para o wrangling + checkpoint Parquet)
+    save_records(records, COMPLETE_FILE)
+    save_checkpoint(records)
     
     # Remove arquivo de progresso
     if PROGRESS_FILE.exists():
@@ -278,8 +905,9 @@ def main():
     
     # Estatísticas finais
     elapsed = (datetime.now() - start_time).seconds
-    completed_final = (df['transcription_status'] == 'completed').sum()
-    errors_final = (df['transcription_status'] == 'error').sum()
+    status_counts = Counter(r['transcription_status'] for r in records)
+    completed_final = status_counts['completed']
+    errors_final = status_counts['error']
     
     print()
     print("=" * 70)
@@ -297,12 +925,12 @@ def main():
     # Mostra erros se houver
     if errors_final > 0:
         print("⚠️  Arquivos com erro:")
-        error_df = df[df['transcription_status'] == 'error']
-        for _, row in error_df[['file_path', 'error_message']].head(10).iterrows():
+        error_records = [r for r in records if r['transcription_status'] == 'error']
+        for row in error_records[:10]:
             print(f"   - {row['file_path']}: {row['error_message']}")
     
     print("=" * 70)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -21,7 +21,8 @@ from .config import (
     PERIODOS_DIA,
     DIAS_SEMANA,
     MESES,
-    REGEX_PATTERNS
+    REGEX_PATTERNS,
+    REGEX_COMPILED
 )
 
 __version__ = '2.0.0'
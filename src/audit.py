@@ -8,6 +8,10 @@ de transformações, garantindo rastreabilidade do pipeline.
 import os
 import pandas as pd
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.audit import MAX_AUDIT_WORKERS, PARALLEL_MIN_FILES
+from utils.file_helpers import count_lines, format_bytes
 
 
 def get_file_metadata(file_path: str) -> dict:
@@ -20,28 +24,19 @@ def get_file_metadata(file_path: str) -> dict:
     Returns:
         Dict com métricas do arquivo
     """
-    size_bytes = os.path.getsize(file_path)
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    stat_result = os.stat(file_path)
+    size_bytes = stat_result.st_size
     
     return {
         'path': file_path,
         'size_bytes': size_bytes,
         'size_formatted': format_bytes(size_bytes),
-        'total_lines': len(lines)
+        # Cacheado por (path, mtime, tamanho): num pipeline a saída da etapa N é a
+        # entrada da etapa N+1 e só precisa ser contada uma vez
+        'total_lines': count_lines(file_path, stat_result=stat_result)
     }
 
 
-def format_bytes(size: int) -> str:
-    """Formata bytes para unidade legível."""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024:
-            return f"{size:.2f} {unit}"
-        size /= 1024
-    return f"{size:.2f} TB"
-
-
 def audit_transformation(before_file: str, 
                          after_file: str, 
                          description: str) -> dict:
@@ -94,10 +89,17 @@ def audit_pipeline(stages: list[tuple[str, str, str]]) -> list[dict]:
         ]
         audits = audit_pipeline(stages)
     """
-    return [
-        audit_transformation(before, after, desc) 
-        for before, after, desc in stages
-    ]
+    if not stages:
+        return []
+    
+    # Estágios são independentes: com arquivos suficientes, audita em paralelo
+    # (ordem preservada); mesmo limiar de utils.audit.audit_pipeline
+    n_files = len({path for stage in stages for path in stage[:2]})
+    if n_files < PARALLEL_MIN_FILES:
+        return [audit_transformation(*stage) for stage in stages]
+    
+    with ThreadPoolExecutor(max_workers=min(MAX_AUDIT_WORKERS, len(stages))) as ex:
+        return list(ex.map(lambda stage: audit_transformation(*stage), stages))
 
 
 def print_audit_report(audits: list[dict], show_files: bool = False):
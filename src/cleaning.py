@@ -7,13 +7,332 @@ Uso:
     result = run_pipeline(
         order=['u200e', 'empty_timestamps', 'anonymize'],
         raw_file=Path('raw-data.txt'),
-        output_dir=Path('data/interim')
+        output_dir=Path('data/interim'),
+        debug=False  # True grava também os arquivos intermediários
     )
+    
+    # Produção: uma única passada, sem intermediários
+    metrics = run_fused_pipeline(
+        input_file=Path('raw-data.txt'),
+        output_file=Path('data/interim/raw-data_clean.txt'),
+        steps=['u200e', 'empty_timestamps', 'anonymize']
+    )
+    
+    # Sem disco: blocos de bytes entram, blocos de bytes limpos saem
+    metrics = {}
+    for chunk in clean_chunks(source_chunks, ['u200e', 'anonymize'], metrics):
+        sink.write(chunk)
 """
 
+import io
+import os
 import re
+import sys
+import mmap
+import codecs
+from collections import deque
+from contextlib import ExitStack
+from functools import reduce
 from pathlib import Path
-from utils import audit_transformation, audit_pipeline
+from typing import Callable, Iterable, Iterator, TypedDict
+from config import REGEX_COMPILED, NOME_PARA_ANONIMO, ANON_RE, ANON_SUB
+from utils import audit_transformation, audit_pipeline, get_file_stats, build_file_stats
+
+
+# Buffer de escrita dos arquivos intermediários (1 MiB)
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Tamanho dos blocos de bytes produzidos por clean_chunks() (64 KiB)
+CHUNK_SIZE = 64 << 10
+
+# Espaços consecutivos (compilado uma vez, não a cada linha)
+_MULTISPACE_RE = re.compile(r' {2,}')
+
+# Marcadores de mídia em uma única alternância (uma varredura por linha)
+_MEDIA_PATTERNS = [
+    '<attached:', 'audio omitted', 'image omitted', 'video omitted', 
+    'sticker omitted', 'GIF omitted', 'document omitted'
+]
+_MEDIA_RE = re.compile('|'.join(map(re.escape, _MEDIA_PATTERNS)))
+
+# Timestamp no formato original "[dd/mm/aa, hh:mm:ss]" e no otimizado "dd/mm/aa hh:mm:ss"
+_TS_OPT_RE = REGEX_COMPILED['timestamp_original']
+_TS_OPTIMIZED_RE = REGEX_COMPILED['timestamp_otimizado']
+
+
+def _is_ts_prefix(s: str) -> bool:
+    """
+    Equivale a re.match(r'^\[\d{2}/\d{2}/\d{2}, \d{2}:\d{2}:\d{2}\]', s).
+    
+    O prefixo tem formato fixo, então comparar posições é bem mais barato
+    que rodar o regex em todas as linhas.
+    """
+    return (len(s) >= 20 and s[0] == '[' and s[3] == '/' and s[6] == '/'
+            and s[9] == ',' and s[10] == ' ' and s[13] == ':' and s[16] == ':'
+            and s[19] == ']'
+            and (s[1:3] + s[4:6] + s[7:9] + s[11:13] + s[14:16] + s[17:19]).isdecimal())
+
+
+# =============================================================================
+# I/O DE LINHAS
+# Leitura via mmap (sem cópia para buffer do Python) e escrita bufferizada
+# =============================================================================
+
+def _mmap_lines(path):
+    """
+    Itera as linhas de um arquivo UTF-8 mapeado em memória.
+    
+    As linhas são decodificadas sob demanda, sem materializar o arquivo
+    inteiro como lista. Quebras CRLF e CR isolado viram LF, como no modo
+    texto do Python (newlines universais).
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in iter(mm.readline, b''):
+                if b'\r' not in raw:
+                    yield raw.decode('utf-8')
+                    continue
+                
+                # Caso raro: normaliza e reparte nas novas quebras
+                *lines, last = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n').split('\n')
+                for line in lines:
+                    yield line + '\n'
+                if last:
+                    yield last
+
+
+def _open_output(path):
+    """Abre arquivo de saída em modo texto com buffer de 1 MiB."""
+    return open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+
+
+def _count_stream(lines, counts: dict):
+    """
+    Repassa as linhas contando o que get_file_stats() mediria no arquivo gravado.
+    
+    Bytes em UTF-8; linhas como em splitlines() (que também quebra em
+    separadores Unicode como U+2028). Preenche `counts` ao final com
+    size_bytes, total_lines e total_chars.
+    """
+    size_bytes = total_lines = total_chars = 0
+    
+    for line in lines:
+        n_chars = len(line)
+        size_bytes += n_chars if line.isascii() else len(line.encode('utf-8'))
+        total_chars += n_chars
+        total_lines += len(line.splitlines())
+        yield line
+    
+    counts.update(size_bytes=size_bytes, total_lines=total_lines, total_chars=total_chars)
+
+
+def _tee_stream(lines, f_out):
+    """Repassa as linhas gravando uma cópia em f_out (modo debug)."""
+    for line in lines:
+        f_out.write(line)
+        yield line
+
+
+def decode_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Converte blocos de bytes UTF-8 (de qualquer tamanho) em linhas.
+    
+    Mesma semântica de _mmap_lines(): CRLF e CR isolado viram LF, inclusive
+    quando a quebra ou um caractere multibyte cai na fronteira entre blocos.
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    pending = ''
+    
+    for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split('\n')
+        for line in lines:
+            yield line + '\n'
+    
+    *lines, pending = (pending + decoder.decode(b'', final=True)).split('\n')
+    for line in lines:
+        yield line + '\n'
+    if pending:
+        yield pending
+
+
+def encode_lines(lines: Iterable[str], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Agrupa linhas em blocos UTF-8 de ~chunk_size bytes (menos chamadas de escrita)."""
+    batch = []
+    size = 0
+    
+    for line in lines:
+        batch.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(batch).encode('utf-8')
+            batch.clear()
+            size = 0
+    
+    if batch:
+        yield ''.join(batch).encode('utf-8')
+
+
+# =============================================================================
+# TRANSFORMAÇÕES EM STREAMING
+# Cada função recebe um iterável de linhas e um dict de métricas, e produz as
+# linhas transformadas. As métricas são preenchidas quando o stream termina.
+# Encadeadas, executam o pipeline inteiro em uma única passada (ver
+# run_fused_pipeline).
+# =============================================================================
+
+def remove_u200e_stream(lines, metrics: dict):
+    """Stream de remove_u200e()."""
+    total = 0
+    
+    for line in lines:
+        # `in` + replace é bem mais rápido que str.translate para um único caractere
+        if '\u200e' in line:
+            total += line.count('\u200e')
+            line = line.replace('\u200e', '')
+        yield line
+    
+    metrics['caracteres_removidos'] = total
+
+
+def remove_empty_timestamps_stream(lines, metrics: dict):
+    """Stream de remove_empty_timestamps() (janela deslizante de 3 linhas)."""
+    def is_redundant(curr, next1, next2):
+        curr, next1 = curr.strip(), next1.strip()
+        
+        if _is_ts_prefix(curr) and curr.endswith(':') and _is_ts_prefix(next1):
+            if not _MEDIA_RE.search(next1):
+                return False
+            next2 = next2.strip()
+            return _is_ts_prefix(next2) and _MEDIA_RE.search(next2) is not None
+        return False
+    
+    # Decide sobre a primeira linha da janela olhando as duas seguintes
+    window = deque(maxlen=3)
+    removed = 0
+    
+    for line in lines:
+        window.append(line)
+        if len(window) < 3:
+            continue
+        
+        if is_redundant(*window):
+            removed += 1
+        else:
+            yield window[0]
+        window.popleft()
+    
+    yield from window
+    
+    metrics['linhas_removidas'] = removed
+
+
+def remove_empty_lines_stream(lines, metrics: dict):
+    """Stream de remove_empty_lines()."""
+    removed = 0
+    
+    for line in lines:
+        if line == '\n':
+            removed += 1
+        else:
+            yield line
+    
+    metrics['linhas_removidas'] = removed
+
+
+def normalize_whitespace_stream(lines, metrics: dict):
+    """Stream de normalize_whitespace()."""
+    orig_size = 0
+    clean_size = 0
+    
+    for original in lines:
+        line = original.rstrip() + '\n'
+        indent = len(line) - len(line.lstrip())
+        content = line[indent:].replace('\t', ' ')
+        content = _MULTISPACE_RE.sub(' ', content)
+        cleaned = line[:indent] + content
+        
+        orig_size += len(original.encode('utf-8'))
+        clean_size += len(cleaned.encode('utf-8'))
+        yield cleaned
+    
+    metrics['bytes_economizados'] = orig_size - clean_size
+
+
+def anonymize_participants_stream(lines, metrics: dict):
+    """Stream de anonymize_participants()."""
+    counts = {k: 0 for k in NOME_PARA_ANONIMO}
+    found = set()
+    
+    def substitute(match):
+        found.add(match.group(1))
+        return ANON_SUB(match)
+    
+    for line in lines:
+        line = ANON_RE.sub(substitute, line)
+        
+        # Conta linhas afetadas por nome (não ocorrências)
+        if found:
+            for name in found:
+                counts[name] += 1
+            found.clear()
+        yield line
+    
+    metrics['substituicoes'] = counts
+
+
+def optimize_timestamps_stream(lines, metrics: dict):
+    """Stream de optimize_timestamps()."""
+    match_ts = _TS_OPT_RE.match
+    count = 0
+    
+    for line in lines:
+        m = match_ts(line)
+        if m:
+            line = f"{m[1]} {m[2]}{line[m.end():]}"
+            count += 1
+        yield line
+    
+    metrics['timestamps_otimizados'] = count
+
+
+def normalize_indentation_stream(lines, metrics: dict):
+    """Stream de normalize_indentation()."""
+    match_ts = _TS_OPTIMIZED_RE.match
+    spaces = 0
+    
+    for line in lines:
+        # Se NÃO começa com timestamp, é linha de continuação
+        if not match_ts(line):
+            orig_len = len(line)
+            line = line.lstrip(' \t')
+            spaces += orig_len - len(line)
+        yield line
+    
+    metrics['espacos_removidos'] = spaces
+
+
+def _run_stream(stream_fn, input_file, output_file) -> dict:
+    """Aplica uma transformação em streaming de arquivo para arquivo."""
+    metrics = {}
+    with _open_output(output_file) as f_out:
+        f_out.writelines(stream_fn(_mmap_lines(input_file), metrics))
+    return metrics
+
+
+def make_file_wrapper(stream_fn: Callable) -> Callable:
+    """
+    Cria a versão (input_file, output_file) -> métricas de um stream_fn.
+    
+    Para registrar etapas novas em CLEANING_STEPS escrevendo só o stream.
+    """
+    def file_wrapper(input_file, output_file):
+        return _run_stream(stream_fn, input_file, output_file)
+    
+    file_wrapper.__name__ = stream_fn.__name__.removesuffix('_stream')
+    file_wrapper.__doc__ = f"Versão arquivo → arquivo de {stream_fn.__name__}()."
+    return file_wrapper
 
 
 # =============================================================================
@@ -29,16 +348,7 @@ def remove_u200e(input_file, output_file):
     a exportação para controle de direção de texto, mas não carrega informação
     semântica útil para análise.
     """
-    invisible_char = '\u200e'
-    total = 0
-    
-    with open(input_file, 'r', encoding='utf-8') as f_in:
-        with open(output_file, 'w', encoding='utf-8') as f_out:
-            for line in f_in:
-                total += line.count(invisible_char)
-                f_out.write(line.replace(invisible_char, ''))
-    
-    return {'caracteres_removidos': total}
+    return _run_stream(remove_u200e_stream, input_file, output_file)
 
 
 def remove_empty_timestamps(input_file, output_file):
@@ -49,33 +359,7 @@ def remove_empty_timestamps(input_file, output_file):
     uma linha com timestamp e remetente vazios, seguida das mídias. A primeira
     linha é redundante e pode ser removida.
     """
-    timestamp_pattern = r'^\[\d{2}/\d{2}/\d{2}, \d{2}:\d{2}:\d{2}\]'
-    media_patterns = [
-        '<attached:', 'audio omitted', 'image omitted', 'video omitted', 
-        'sticker omitted', 'GIF omitted', 'document omitted'
-    ]
-    
-    lines = open(input_file, 'r', encoding='utf-8').readlines()
-    skip = set()
-    
-    for i in range(len(lines) - 2):
-        curr = lines[i].strip()
-        next1 = lines[i + 1].strip()
-        next2 = lines[i + 2].strip()
-        
-        if (re.match(timestamp_pattern, curr) and curr.endswith(':') and 
-            re.match(timestamp_pattern, next1)):
-            has_media_next = any(p in next1 for p in media_patterns)
-            has_media_next2 = (re.match(timestamp_pattern, next2) and 
-                               any(p in next2 for p in media_patterns))
-            
-            if has_media_next and has_media_next2:
-                skip.add(i)
-    
-    cleaned = [l for i, l in enumerate(lines) if i not in skip]
-    open(output_file, 'w', encoding='utf-8').writelines(cleaned)
-    
-    return {'linhas_removidas': len(skip)}
+    return _run_stream(remove_empty_timestamps_stream, input_file, output_file)
 
 
 def remove_empty_lines(input_file, output_file):
@@ -85,11 +369,7 @@ def remove_empty_lines(input_file, output_file):
     Linhas que contêm apenas \\n não carregam informação e podem ser removidas
     para reduzir o tamanho do arquivo.
     """
-    lines = open(input_file, 'r', encoding='utf-8').readlines()
-    cleaned = [l for l in lines if l != '\n']
-    open(output_file, 'w', encoding='utf-8').writelines(cleaned)
-    
-    return {'linhas_removidas': len(lines) - len(cleaned)}
+    return _run_stream(remove_empty_lines_stream, input_file, output_file)
 
 
 def normalize_whitespace(input_file, output_file):
@@ -101,48 +381,18 @@ def normalize_whitespace(input_file, output_file):
     - Trailing whitespace → removido
     - Indentação inicial → preservada (tratada em etapa separada)
     """
-    lines = open(input_file, 'r', encoding='utf-8').readlines()
-    cleaned = []
-    
-    for line in lines:
-        line = line.rstrip() + '\n'
-        indent = len(line) - len(line.lstrip())
-        content = line[indent:].replace('\t', ' ')
-        content = re.sub(r' {2,}', ' ', content)
-        cleaned.append(line[:indent] + content)
-    
-    open(output_file, 'w', encoding='utf-8').writelines(cleaned)
-    
-    orig_size = sum(len(l.encode('utf-8')) for l in lines)
-    clean_size = sum(len(l.encode('utf-8')) for l in cleaned)
-    
-    return {'bytes_economizados': orig_size - clean_size}
+    return _run_stream(normalize_whitespace_stream, input_file, output_file)
 
 
 def anonymize_participants(input_file, output_file):
     """
     Substitui nomes dos participantes por identificadores anônimos.
     
-    Mapeamento padrão:
+    Mapeamento em config.NOME_PARA_ANONIMO (padrão):
     - Marlon → P1
     - Lê 🖤 → P2
     """
-    mapping = {'Marlon': 'P1', 'Lê 🖤': 'P2'}
-    
-    lines = open(input_file, 'r', encoding='utf-8').readlines()
-    result = []
-    counts = {k: 0 for k in mapping}
-    
-    for line in lines:
-        for name, anon in mapping.items():
-            if f'] {name}:' in line:
-                line = line.replace(f'] {name}:', f'] {anon}:')
-                counts[name] += 1
-        result.append(line)
-    
-    open(output_file, 'w', encoding='utf-8').writelines(result)
-    
-    return {'substituicoes': counts}
+    return _run_stream(anonymize_participants_stream, input_file, output_file)
 
 
 def optimize_timestamps(input_file, output_file):
@@ -154,23 +404,7 @@ def optimize_timestamps(input_file, output_file):
     
     Economiza 4 caracteres por mensagem e facilita o parsing.
     """
-    pattern = r'^\[(\d{2}/\d{2}/\d{2}), (\d{2}:\d{2}:\d{2})\]'
-    
-    lines = open(input_file, 'r', encoding='utf-8').readlines()
-    result = []
-    count = 0
-    
-    for line in lines:
-        match = re.match(pattern, line)
-        if match:
-            result.append(f"{match.group(1)} {match.group(2)}" + line[len(match.group(0)):])
-            count += 1
-        else:
-            result.append(line)
-    
-    open(output_file, 'w', encoding='utf-8').writelines(result)
-    
-    return {'timestamps_otimizados': count}
+    return _run_stream(optimize_timestamps_stream, input_file, output_file)
 
 
 def normalize_indentation(input_file, output_file):
@@ -181,34 +415,29 @@ def normalize_indentation(input_file, output_file):
     das linhas de continuação. Esses espaços são visuais e não carregam
     informação semântica.
     """
-    timestamp_pattern = r'^\d{2}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}'
-    
-    lines = open(input_file, 'r', encoding='utf-8').readlines()
-    result = []
-    spaces = 0
-    
-    for line in lines:
-        # Se NÃO começa com timestamp, é linha de continuação
-        if not re.match(timestamp_pattern, line):
-            orig_len = len(line)
-            line = line.lstrip(' \t')
-            spaces += orig_len - len(line)
-        result.append(line)
-    
-    open(output_file, 'w', encoding='utf-8').writelines(result)
-    
-    return {'espacos_removidos': spaces}
+    return _run_stream(normalize_indentation_stream, input_file, output_file)
 
 
 # =============================================================================
 # REGISTRO DE ETAPAS DISPONÍVEIS
-# Cada etapa tem: id, name, function, description
+# Cada etapa tem: id, name, function, stream_fn, description
 # =============================================================================
 
-CLEANING_STEPS = {
+class CleaningStep(TypedDict):
+    """Contrato de uma etapa em CLEANING_STEPS."""
+    name: str
+    # (input_file, output_file) -> dict de métricas
+    function: Callable
+    # (linhas, dict de métricas) -> linhas transformadas
+    stream_fn: Callable[[Iterable[str], dict], Iterable[str]]
+    description: str
+
+
+CLEANING_STEPS: dict[str, CleaningStep] = {
     'u200e': {
         'name': 'Remoção U+200E',
         'function': remove_u200e,
+        'stream_fn': remove_u200e_stream,
         'description': '''O caractere `U+200E` (Left-to-Right Mark) é um caractere de formatação invisível 
 usado para controle de direção de texto. O WhatsApp o insere sistematicamente 
 durante a exportação, mas não carrega informação semântica útil.
@@ -218,18 +447,21 @@ durante a exportação, mas não carrega informação semântica útil.
     'empty_timestamps': {
         'name': 'Remoção timestamps vazios',
         'function': remove_empty_timestamps,
+        'stream_fn': remove_empty_timestamps_stream,
         'description': '''Quando múltiplas mídias são enviadas simultaneamente, o WhatsApp registra uma 
 linha com timestamp vazio seguida das mídias. A primeira linha é redundante.'''
     },
     'empty_lines': {
         'name': 'Remoção linhas vazias',
         'function': remove_empty_lines,
+        'stream_fn': remove_empty_lines_stream,
         'description': '''Linhas completamente vazias (apenas `\\n`) aparecem entre mensagens e não 
 carregam informação. Serão removidas preservando a formatação interna.'''
     },
     'whitespace': {
         'name': 'Normalização espaços',
         'function': normalize_whitespace,
+        'stream_fn': normalize_whitespace_stream,
         'description': '''Normaliza espaços em branco internos:
 - Múltiplos espaços → espaço único
 - Tabs → espaço único  
@@ -239,6 +471,7 @@ carregam informação. Serão removidas preservando a formatação interna.'''
     'anonymize': {
         'name': 'Anonimização',
         'function': anonymize_participants,
+        'stream_fn': anonymize_participants_stream,
         'description': '''Substitui nomes dos participantes por identificadores genéricos:
 - Marlon → P1
 - Lê 🖤 → P2'''
@@ -246,6 +479,7 @@ carregam informação. Serão removidas preservando a formatação interna.'''
     'timestamps': {
         'name': 'Otimização timestamps',
         'function': optimize_timestamps,
+        'stream_fn': optimize_timestamps_stream,
         'description': '''Remove delimitadores redundantes para facilitar o parsing:
 - De: `[28/11/24, 19:30:05] P1: Mensagem`
 - Para: `28/11/24 19:30:05 P1: Mensagem`'''
@@ -253,6 +487,7 @@ carregam informação. Serão removidas preservando a formatação interna.'''
     'indentation': {
         'name': 'Normalização indentação',
         'function': normalize_indentation,
+        'stream_fn': normalize_indentation_stream,
         'description': '''Remove espaços/tabs iniciais de linhas de continuação (mensagens multilinha).
 Esses espaços são visuais e não carregam informação semântica.'''
     },
@@ -263,27 +498,114 @@ Esses espaços são visuais e não carregam informação semântica.'''
 # EXECUTOR DO PIPELINE
 # =============================================================================
 
-def run_pipeline(order: list, raw_file: Path, output_dir: Path, show_progress: bool = True) -> dict:
+def _validate_order(order: list):
+    """Valida IDs de etapa contra CLEANING_STEPS."""
+    invalid_ids = [sid for sid in order if sid not in CLEANING_STEPS]
+    if invalid_ids:
+        raise ValueError(f"IDs de etapa inválidos: {invalid_ids}. "
+                        f"Disponíveis: {list(CLEANING_STEPS.keys())}")
+
+
+def run_fused_pipeline(input_file: Path, output_file: Path, steps: list) -> dict:
+    """
+    Executa as etapas em uma única passada sobre o arquivo.
+    
+    Encadeia os `stream_fn` de cada etapa: o arquivo é lido uma vez, cada
+    linha atravessa todas as transformações em ordem e só o resultado final
+    é gravado. Mesmo resultado de run_pipeline(), sem auditoria — é o
+    caminho mais enxuto para produção.
+    
+    Args:
+        input_file: Path do arquivo de entrada (raw-data.txt)
+        output_file: Path do arquivo limpo a gerar
+        steps: Lista de IDs das etapas na ordem desejada
+        
+    Returns:
+        Dict {step_id: dict} com as métricas de cada etapa
+        
+    Raises:
+        ValueError: Se algum step_id não existir em CLEANING_STEPS
+    """
+    _validate_order(steps)
+    
+    metrics = {}
+    stream = chain_steps(_mmap_lines(input_file), steps, metrics)
+    
+    with _open_output(output_file) as f_out:
+        f_out.writelines(stream)
+    
+    return metrics
+
+
+def chain_steps(lines: Iterable[str], steps: list, metrics: dict) -> Iterator[str]:
+    """
+    Encadeia os stream_fn das etapas sobre um iterável de linhas.
+    
+    Nada é lido até o resultado ser consumido; `metrics[step_id]` é preenchido
+    quando o stream termina.
+    """
+    for step_id in steps:
+        metrics[step_id] = {}
+    
+    return reduce(
+        lambda stream, step_id: CLEANING_STEPS[step_id]['stream_fn'](stream, metrics[step_id]),
+        steps,
+        iter(lines)
+    )
+
+
+def clean_chunks(chunks: Iterable[bytes], steps: list, metrics: dict = None) -> Iterator[bytes]:
+    """
+    Limpa um fluxo de blocos de bytes, sem passar por arquivos.
+    
+    Para usar as etapas fora do disco (socket, fila, stdin...): os blocos de
+    entrada podem ter qualquer tamanho; a saída sai em blocos de ~CHUNK_SIZE.
+    Mesmo resultado de run_fused_pipeline() sobre os mesmos bytes.
+    
+    Args:
+        chunks: Iterável de bytes UTF-8 (ex: iter(lambda: f.read(1 << 16), b''))
+        steps: Lista de IDs das etapas na ordem desejada
+        metrics: Dict opcional, preenchido com {step_id: dict} ao final
+        
+    Raises:
+        ValueError: Se algum step_id não existir em CLEANING_STEPS
+    """
+    _validate_order(steps)
+    
+    if metrics is None:
+        metrics = {}
+    return encode_lines(chain_steps(decode_lines(chunks), steps, metrics))
+
+
+def run_pipeline(order: list, raw_file: Path, output_dir: Path, show_progress: bool = True,
+                 debug: bool = False) -> dict:
     """
     Executa pipeline de limpeza na ordem especificada.
     
+    As etapas são encadeadas em streaming (uma leitura do raw, uma escrita do
+    arquivo final). A auditoria de cada etapa usa contadores aplicados ao
+    fluxo entre as etapas, sem reler arquivos.
+    
     Args:
         order: Lista de IDs das etapas na ordem desejada.
                 Ex: ['u200e', 'anonymize', 'timestamps']
         raw_file: Path do arquivo de entrada (raw-data.txt)
         output_dir: Path do diretório para arquivos intermediários
         show_progress: Se True, imprime progresso no console
+        debug: Se True, grava também os arquivos intermediários
+               (raw-data_cln1.txt, raw-data_cln2.txt, ...)
         
     Returns:
         Dict com:
         - outputs: {step_id: Path} - Caminhos dos arquivos gerados
+                   (só a última etapa, exceto com debug=True)
         - audits: {step_id: dict} - Resultados das auditorias
         - metrics: {step_id: dict} - Métricas retornadas pelas funções
         - order: list - Ordem executada
         - steps: dict - Referência para CLEANING_STEPS
         - df_audit: DataFrame - Auditoria consolidada
         - totals: dict - Totais do pipeline
-        - final_output: Path - Arquivo final gerado
+        - final_output: Path - Arquivo final gerado (raw-data_cln{N}.txt)
         
     Raises:
         ValueError: Se algum step_id não existir em CLEANING_STEPS
@@ -299,11 +621,7 @@ def run_pipeline(order: list, raw_file: Path, output_dir: Path, show_progress: b
         print(result['totals']['total_percent'])  # Redução total %
         print(result['final_output'])  # Arquivo final
     """
-    # Valida IDs
-    invalid_ids = [sid for sid in order if sid not in CLEANING_STEPS]
-    if invalid_ids:
-        raise ValueError(f"IDs de etapa inválidos: {invalid_ids}. "
-                        f"Disponíveis: {list(CLEANING_STEPS.keys())}")
+    _validate_order(order)
     
     # Garante que output_dir existe
     output_dir = Path(output_dir)
@@ -314,56 +632,80 @@ def run_pipeline(order: list, raw_file: Path, output_dir: Path, show_progress: b
     outputs = {}
     audits = {}
     metrics = {}
-    
-    previous = raw_file
+    counts = {}
     
     if show_progress:
-        print(f"🔄 Executando pipeline com {len(order)} etapas...\n")
+        print(f"🔄 Executando pipeline com {len(order)} etapas...\n", flush=True)
+    
+    # Relatório por etapa acumulado em memória e emitido numa única escrita
+    # (cada print no Jupyter é uma atualização da célula)
+    progress = io.StringIO()
+    
+    # Original medido no próprio arquivo (bytes exatos, incluindo CRLF)
+    raw_stats = get_file_stats(raw_file)
+    
+    # Monta a cadeia: etapa → contador (→ cópia em disco, se debug)
+    step_files = {step_id: output_dir / f'raw-data_cln{i + 1}.txt' for i, step_id in enumerate(order)}
+    
+    with ExitStack() as stack:
+        stream = _mmap_lines(raw_file)
+        
+        for step_id in order:
+            metrics[step_id] = {}
+            counts[step_id] = {}
+            stream = CLEANING_STEPS[step_id]['stream_fn'](stream, metrics[step_id])
+            stream = _count_stream(stream, counts[step_id])
+            
+            if debug and step_id != order[-1]:
+                f_step = stack.enter_context(_open_output(step_files[step_id]))
+                stream = _tee_stream(stream, f_step)
+                outputs[step_id] = step_files[step_id]
+        
+        if order:
+            with _open_output(step_files[order[-1]]) as f_out:
+                f_out.writelines(stream)
+            outputs[order[-1]] = step_files[order[-1]]
+    
+    # Auditoria de cada etapa a partir dos contadores
+    previous, previous_stats = raw_file, raw_stats
+    stages = [{'file': str(raw_file), 'name': '📄 Original (raw-data.txt)', 'stats': raw_stats}]
     
     for i, step_id in enumerate(order):
         step = CLEANING_STEPS[step_id]
         step_num = i + 1
-        output_file = output_dir / f'raw-data_cln{step_num}.txt'
+        output_file = step_files[step_id]
+        output_stats = build_file_stats(output_file, **counts[step_id])
         
-        if show_progress:
-            print(f"   {step_num}. {step['name']}...", end=' ')
-        
-        # Executa transformação
-        step_metrics = step['function'](previous, output_file)
-        
-        # Auditoria
         audit = audit_transformation(
             previous, 
             output_file, 
             step['name'],
-            show_output=False
+            show_output=False,
+            input_stats=previous_stats,
+            output_stats=output_stats
         )
+        audits[step_id] = audit
         
-        if show_progress:
-            print(f"✅ (-{audit['delta_percent']:.2f}%)")
+        progress.write(f"   {step_num}. {step['name']}... ✅ (-{audit['delta_percent']:.2f}%)\n")
         
-        # Guarda resultados
-        outputs[step_id] = output_file
-        audits[step_id] = audit
-        metrics[step_id] = step_metrics
+        stages.append({
+            'file': str(output_file),
+            'name': f"└─ {step['name']}",
+            'stats': output_stats
+        })
         
         # Próxima etapa usa este output
-        previous = output_file
+        previous, previous_stats = output_file, output_stats
     
     # Auditoria final consolidada
-    stages = [{'file': str(raw_file), 'name': '📄 Original (raw-data.txt)'}]
-    for step_id in order:
-        stages.append({
-            'file': str(outputs[step_id]),
-            'name': f"└─ {CLEANING_STEPS[step_id]['name']}"
-        })
-    
     df_audit, totals = audit_pipeline(stages, show_output=False)
     
     if show_progress:
-        print(f"\n✅ Pipeline concluído!")
-        print(f"   📦 Redução total: {totals['total_percent']:.2f}%")
-        print(f"   📁 Arquivo final: {previous.name}")
+        progress.write(f"\n✅ Pipeline concluído!\n")
+        progress.write(f"   📦 Redução total: {totals['total_percent']:.2f}%\n")
+        progress.write(f"   📁 Arquivo final: {previous.name}\n")
+        sys.stdout.write(progress.getvalue())
+        sys.stdout.flush()
     
     return {
         'outputs': outputs,
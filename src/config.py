@@ -7,6 +7,7 @@ Este módulo contém todas as constantes, paths e thresholds usados
 ao longo do pipeline, facilitando ajustes e manutenção.
 """
 import os
+import re
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -59,6 +60,18 @@ NOME_PARA_ANONIMO = {
     # Adicione variações se houver
 }
 
+# Anonimização em uma única passada: todos os nomes numa alternância, só na
+# posição de remetente "] Nome:" (mais longos primeiro: um nome que é prefixo
+# de outro não encobre o mais longo). Sem nomes, (?!) nunca casa: nada é trocado
+_anon_names = '|'.join(sorted(map(re.escape, NOME_PARA_ANONIMO), key=len, reverse=True))
+ANON_RE = re.compile(r'\] (' + (_anon_names or '(?!)') + r'):')
+
+
+def ANON_SUB(match):
+    """Substituição para ANON_RE: troca o nome do remetente pelo anônimo."""
+    return f'] {NOME_PARA_ANONIMO[match.group(1)]}:'
+
+
 # =============================================================================
 # THRESHOLDS PARA FEATURES
 # =============================================================================
@@ -159,6 +172,13 @@ REGEX_PATTERNS = {
     'deletada': r'This message was deleted'
 }
 
+# Compilados uma vez no import (mesmas chaves de REGEX_PATTERNS).
+# 'u200e' é um caractere literal: fica como str para usar com `in`/replace()
+REGEX_COMPILED = {
+    name: pattern if name == 'u200e' else re.compile(pattern)
+    for name, pattern in REGEX_PATTERNS.items()
+}
+
 
 # =============================================================================
 # TIPOS DE MÍDIA
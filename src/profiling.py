@@ -6,33 +6,64 @@ de arquivos de texto antes de iniciar o processo de limpeza.
 """
 
 import re
+import io
 import os
-import pandas as pd
-from typing import Optional
+import mmap
+from contextlib import contextmanager
+from functools import cache
+from typing import TYPE_CHECKING, Optional
 
+from utils._scan_cache import scan_cached
+from utils.file_helpers import (
+    count_lines, format_bytes, position_to_line, read_line_windows, scan_overview,
+)
 
-def get_file_overview(file_path: str) -> dict:
+# pandas (~0.5 s de import) só é carregado pelas funções que devolvem DataFrame
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Buffer de leitura para as varreduras em streaming (1 MiB)
+READ_BUFFER_SIZE = 1 << 20
+
+# Padrões de analyze_line_patterns(), compilados uma vez
+# (separados + pré-filtro literal: o `re` do CPython não acelera alternâncias,
+# então uma regex combinada varre cada linha ~4x mais devagar)
+_TIMESTAMP_PREFIX_RE = re.compile(r'^\[?\d{2}/\d{2}/\d{2}')
+_MEDIA_OMITTED_RE = re.compile(r'(audio|image|video|sticker|GIF|document) omitted')
+_URL_RE = re.compile(r'https?://')
+
+# Bloco de texto de count_pattern() (4 Mi caracteres, sempre terminando em '\n')
+COUNT_BLOCK_SIZE = 4 << 20
+
+# Se mais de 1 a cada DENSE_LINE_RATIO linhas casa, contar por linha sai mais barato
+DENSE_LINE_RATIO = 8
+
+# Construções que enxergam além da própria linha: com elas, contar no bloco
+# inteiro poderia divergir da contagem por linha. '$' entra aqui porque, por
+# linha, a linha ainda tem o '\n' final (\s$ e \s+$ casam com ele); no bloco
+# sob (?m), não
+_CROSS_LINE_TOKENS = ('(?=', '(?!', '(?<', '\\A', '\\Z', '$')
+
+# Metacaracteres de regex: padrão sem nenhum deles é um literal
+_REGEX_METACHARS = frozenset('.^$*+?{}[]\\|()')
+
+
+def get_file_overview(file_path: str, stat_result: os.stat_result = None) -> dict:
     """
     Retorna visão geral do arquivo com metadados básicos.
     
     Args:
         file_path: Caminho do arquivo
+        stat_result: os.stat() já feito pelo chamador (evita um novo stat)
         
     Returns:
         Dict com métricas do arquivo
     """
-    size_bytes = os.path.getsize(file_path)
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    total_lines = len(lines)
-    total_chars = sum(len(line) for line in lines)
-    non_empty_lines = sum(1 for line in lines if line.strip())
+    stat_result = stat_result or os.stat(file_path)
+    size_bytes = stat_result.st_size
+    total_lines, total_chars, non_empty_lines = scan_overview(file_path, stat_result=stat_result)
     
-    # Estatísticas de comprimento de linha
-    line_lengths = [len(line) for line in lines]
-    avg_line_length = sum(line_lengths) / len(line_lengths) if line_lengths else 0
+    avg_line_length = total_chars / total_lines if total_lines else 0
     
     result = {
         'arquivo': file_path,
@@ -59,16 +90,7 @@ def get_file_overview(file_path: str) -> dict:
     return result
 
 
-def format_bytes(size: int) -> str:
-    """Formata bytes para unidade legível."""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024:
-            return f"{size:.2f} {unit}"
-        size /= 1024
-    return f"{size:.2f} TB"
-
-
-def get_lines_at_position(file_path: str, position: int = 0, n: int = 5) -> pd.DataFrame:
+def get_lines_at_position(file_path: str, position: int = 0, n: int = 5) -> 'pd.DataFrame':
     """
     Retorna n linhas de uma posição percentual do arquivo.
     
@@ -80,27 +102,83 @@ def get_lines_at_position(file_path: str, position: int = 0, n: int = 5) -> pd.D
     Returns:
         DataFrame com número da linha e conteúdo
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    total_lines = len(lines)
-    start_idx = int((position / 100) * total_lines)
+    return _preview_at_positions(file_path, [position], n)[0]
+
+
+def _preview_at_positions(file_path: str, positions: list, n: int) -> list:
+    """
+    Um DataFrame (linha, conteudo) por posição percentual.
     
-    # Ajusta para não ultrapassar o final
-    start_idx = min(start_idx, total_lines - n)
-    start_idx = max(0, start_idx)
+    Em vez de readlines() por posição: a contagem de linhas vem do cache de
+    varredura e todas as janelas saem de uma única leitura em streaming.
+    """
+    import pandas as pd
+    
+    total_lines = count_lines(file_path)
+    starts = [position_to_line(pos, total_lines, n) for pos in positions]
+    windows = read_line_windows(file_path, starts, n)
+    
+    return [
+        pd.DataFrame([
+            {'linha': start + offset + 1, 'conteudo': content}
+            for offset, content in enumerate(windows[start])
+        ])
+        for start in starts
+    ]
+
+
+# =============================================================================
+# BUSCA DIRETA NO ARQUIVO MAPEADO
+# Para literais, mm.find() salta direto para as ocorrências (memchr/fastsearch
+# em C); só as linhas encontradas viram str.
+# =============================================================================
+
+@contextmanager
+def _mapped(file_path: str):
+    """
+    Mapeia o arquivo em memória para busca binária.
     
-    result = []
-    for i in range(start_idx, min(start_idx + n, total_lines)):
-        result.append({
-            'linha': i + 1,
-            'conteudo': lines[i].rstrip('\n')
-        })
+    Produz None quando a busca binária não equivale à leitura em modo texto:
+    arquivo vazio ou com CR (o modo texto converte CR/CRLF em quebra de linha).
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm if mm.find(b'\r') == -1 else None
+
+
+def _iter_hit_lines(mm, needle: bytes):
+    """
+    Itera as linhas que contêm `needle`, sem percorrer as demais.
     
-    return pd.DataFrame(result)
+    Yields:
+        Tuple (nº da linha, início, fim sem o \\n, ocorrências na linha)
+    """
+    line_no = 1
+    counted_to = 0
+    pos = 0
+    
+    while (hit := mm.find(needle, pos)) != -1:
+        start = mm.rfind(b'\n', 0, hit) + 1
+        end = mm.find(b'\n', hit)
+        if end == -1:
+            end = len(mm)
+        
+        line_no += mm[counted_to:start].count(b'\n')
+        counted_to = start
+        
+        yield line_no, start, end, mm[hit:end].count(needle)
+        pos = end + 1
+
 
+def _is_literal(pattern: str) -> bool:
+    """True se o padrão pode ser buscado como bytes literais (mesmo resultado que re)."""
+    return bool(pattern) and '\n' not in pattern and _REGEX_METACHARS.isdisjoint(pattern)
 
-def get_lines_containing(file_path: str, substring: str, n: int = 5) -> pd.DataFrame:
+
+def get_lines_containing(file_path: str, substring: str, n: int = 5) -> 'pd.DataFrame':
     """
     Retorna n linhas que contêm o substring especificado.
     
@@ -112,17 +190,29 @@ def get_lines_containing(file_path: str, substring: str, n: int = 5) -> pd.DataF
     Returns:
         DataFrame com número da linha e conteúdo
     """
+    import pandas as pd
+    
     matches = []
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for i, line in enumerate(f, 1):
-            if substring in line:
+    with _mapped(file_path) as mm:
+        if mm is not None and substring and '\n' not in substring:
+            for i, start, end, _ in _iter_hit_lines(mm, substring.encode('utf-8')):
                 matches.append({
                     'linha': i,
-                    'conteudo': line.rstrip('\n')
+                    'conteudo': mm[start:end].decode('utf-8')
                 })
                 if len(matches) >= n:
                     break
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for i, line in enumerate(f, 1):
+                    if substring in line:
+                        matches.append({
+                            'linha': i,
+                            'conteudo': line.rstrip('\n')
+                        })
+                        if len(matches) >= n:
+                            break
     
     if not matches:
         print(f"⚠️ Nenhuma linha encontrada contendo: '{substring}'")
@@ -131,7 +221,40 @@ def get_lines_containing(file_path: str, substring: str, n: int = 5) -> pd.DataF
     return pd.DataFrame(matches)
 
 
-def get_lines_matching(file_path: str, pattern: str, n: int = 5) -> pd.DataFrame:
+def _compile_pattern(pattern: str, engine: str = 're'):
+    """
+    Compila o padrão com o engine pedido.
+    
+    engine='re2' usa google-re2 (opcional), que garante tempo linear mesmo
+    para padrões com backtracking catastrófico. Não é o padrão: para os
+    padrões típicos do projeto o `re` é mais rápido (a chamada ao re2 por
+    linha custa mais que o próprio match). Se re2 não estiver instalado ou
+    não suportar o padrão (lookarounds, backreferences), usa `re`.
+    
+    Raises:
+        ValueError: Se engine não for 're' nem 're2'
+        re.error: Se o padrão não for uma regex válida
+    """
+    if engine not in ('re', 're2'):
+        raise ValueError(f"engine inválido: {engine!r}. Use 're' ou 're2'")
+    
+    if engine == 're2':
+        try:
+            import re2
+        except ImportError:
+            print("⚠️ google-re2 não instalado. Usando re. Instale com: pip install google-re2")
+        else:
+            options = re2.Options()
+            options.log_errors = False
+            try:
+                return re2.compile(pattern, options)
+            except re2.error:
+                pass
+    
+    return re.compile(pattern)
+
+
+def get_lines_matching(file_path: str, pattern: str, n: int = 5, engine: str = 're') -> 'pd.DataFrame':
     """
     Retorna n linhas que casam com o padrão regex.
     
@@ -139,12 +262,15 @@ def get_lines_matching(file_path: str, pattern: str, n: int = 5) -> pd.DataFrame
         file_path: Caminho do arquivo
         pattern: Padrão regex
         n: Número máximo de linhas a retornar
+        engine: 're' (padrão) ou 're2' (tempo linear, requer google-re2)
         
     Returns:
         DataFrame com número da linha e conteúdo
     """
+    import pandas as pd
+    
     matches = []
-    regex = re.compile(pattern)
+    regex = _compile_pattern(pattern, engine)
     
     with open(file_path, 'r', encoding='utf-8') as f:
         for i, line in enumerate(f, 1):
@@ -163,13 +289,110 @@ def get_lines_matching(file_path: str, pattern: str, n: int = 5) -> pd.DataFrame
     return pd.DataFrame(matches)
 
 
-def count_pattern(file_path: str, pattern: str) -> dict:
+def _iter_text_blocks(file_path: str, block_size: int = COUNT_BLOCK_SIZE):
+    """
+    Lê o arquivo em blocos grandes, sempre terminando em fim de linha.
+    
+    Sem CR, fatia o arquivo mapeado e decodifica cada bloco (evita o custo da
+    tradução de quebras de linha do modo texto); com CR, lê em modo texto.
+    """
+    with _mapped(file_path) as mm:
+        if mm is not None:
+            start, size = 0, len(mm)
+            while start < size:
+                end = mm.find(b'\n', start + block_size - 1)
+                end = size if end == -1 else end + 1
+                yield mm[start:end].decode('utf-8')
+                start = end
+            return
+    
+    with open(file_path, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            if not block.endswith('\n'):
+                block += f.readline()
+            yield block
+
+
+def _count_block_literal(block: str, pattern: str) -> tuple:
+    """Conta (ocorrências, linhas com ocorrência) de um literal sem '\\n' no bloco."""
+    total = lines_with = 0
+    line_end = -1
+    step = len(pattern)
+    find = block.find
+    
+    pos = find(pattern)
+    while pos != -1:
+        total += 1
+        if pos > line_end:
+            lines_with += 1
+            line_end = find('\n', pos)
+            if line_end == -1:
+                line_end = len(block)
+        pos = find(pattern, pos + step)
+    
+    return total, lines_with
+
+
+def _count_block_regex(block: str, block_regex) -> Optional[tuple]:
+    """
+    Conta (ocorrências, linhas com ocorrência) de uma regex no bloco inteiro.
+    
+    `block_regex` é compilada com MULTILINE, então ^ vale por linha ($ não
+    chega aqui: ver _CROSS_LINE_TOKENS).
+    Retorna None (bloco recontado linha a linha) se algum match atravessar uma
+    quebra de linha ou for vazio, pois aí o resultado por linha seria outro,
+    ou se o padrão for denso: com match em muitas linhas, o laço por match
+    custa mais que findall por linha.
+    """
+    total = lines_with = 0
+    line_end = -1
+    max_lines = block.count('\n') // DENSE_LINE_RATIO + 1
+    find = block.find
+    
+    for m in block_regex.finditer(block):
+        start, end = m.span()
+        if start == end or find('\n', start, end - 1) != -1:
+            return None
+        total += 1
+        if start > line_end:
+            lines_with += 1
+            if lines_with > max_lines:
+                return None
+            line_end = find('\n', start)
+            if line_end == -1:
+                line_end = len(block)
+    
+    return total, lines_with
+
+
+def _count_block_by_line(block: str, regex, pattern: str) -> tuple:
+    """Contagem linha a linha do bloco (mesma semântica de `for line in f`)."""
+    total = lines_with = 0
+    
+    # StringIO quebra só em '\n' (splitlines() também quebraria em U+2028 etc.)
+    for line in io.StringIO(block):
+        found = len(regex.findall(line)) if regex is not None else line.count(pattern)
+        total += found
+        if found > 0:
+            lines_with += 1
+    
+    return total, lines_with
+
+
+def count_pattern(file_path: str, pattern: str, engine: str = 're') -> dict:
     """
     Conta ocorrências de um padrão no arquivo.
     
+    Regex são contadas em blocos de vários MB (uma varredura por bloco, não
+    por linha), com o mesmo resultado da contagem linha a linha.
+    
     Args:
         file_path: Caminho do arquivo
         pattern: Padrão regex ou string literal
+        engine: 're' (padrão) ou 're2' (tempo linear, requer google-re2)
         
     Returns:
         Dict com total de ocorrências e linhas afetadas
@@ -179,21 +402,47 @@ def count_pattern(file_path: str, pattern: str) -> dict:
     
     # Tenta compilar como regex, senão usa como string literal
     try:
-        regex = re.compile(pattern)
+        regex = _compile_pattern(pattern, engine)
         use_regex = True
     except re.error:
         use_regex = False
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if use_regex:
-                found = len(regex.findall(line))
-            else:
-                found = line.count(pattern)
-            
-            total += found
-            if found > 0:
-                lines_with += 1
+    # Literal (ou regex sem metacaracteres): salta direto às ocorrências
+    if not use_regex or _is_literal(pattern):
+        with _mapped(file_path) as mm:
+            if mm is not None and pattern and '\n' not in pattern:
+                for _, _, _, found in _iter_hit_lines(mm, pattern.encode('utf-8')):
+                    total += found
+                    lines_with += 1
+                
+                return {
+                    'total_ocorrencias': total,
+                    'linhas_com_pattern': lines_with
+                }
+    
+    # Blocos de vários MB: uma chamada findall/count por bloco, não por linha
+    block_regex = None
+    if use_regex and not any(token in pattern for token in _CROSS_LINE_TOKENS):
+        # Se o re2 já caiu para `re` (não instalado/padrão não suportado), não tenta de novo
+        block_engine = 're' if isinstance(regex, re.Pattern) else engine
+        block_regex = _compile_pattern('(?m)' + pattern, block_engine)
+    literal_ok = not use_regex and pattern and '\n' not in pattern
+    
+    for block in _iter_text_blocks(file_path):
+        if block_regex is not None:
+            counted = _count_block_regex(block, block_regex)
+        elif literal_ok:
+            counted = _count_block_literal(block, pattern)
+        else:
+            counted = None
+        
+        if counted is None:
+            # Denso ou atravessando linhas: tende a se repetir nos próximos blocos
+            block_regex = None
+            counted = _count_block_by_line(block, regex if use_regex else None, pattern)
+        
+        total += counted[0]
+        lines_with += counted[1]
     
     return {
         'total_ocorrencias': total,
@@ -201,9 +450,16 @@ def count_pattern(file_path: str, pattern: str) -> dict:
     }
 
 
+@cache
+def _separator():
+    """Linha separadora entre posições do preview (montada uma vez, reutilizada)."""
+    import pandas as pd
+    return pd.DataFrame.from_records([('...', '─' * 50, '')], columns=['linha', 'conteudo', 'posicao'])
+
+
 def multi_position_preview(file_path: str, 
                            n_lines: int = 5, 
-                           positions: list = [0, 25, 50, 75, 100]) -> pd.DataFrame:
+                           positions: list = [0, 25, 50, 75, 100]) -> 'pd.DataFrame':
     """
     Retorna preview do arquivo em múltiplas posições percentuais.
     
@@ -216,28 +472,28 @@ def multi_position_preview(file_path: str,
         DataFrame consolidado com separadores entre posições
     """
     all_previews = []
+    previews = _preview_at_positions(file_path, positions, n_lines)
     
-    for pos in positions:
-        preview = get_lines_at_position(file_path, position=pos, n=n_lines)
+    for pos, preview in zip(positions, previews):
         preview['posicao'] = f"{pos}%"
         all_previews.append(preview)
         
         # Adiciona linha separadora (exceto após última posição)
         if pos != positions[-1]:
-            separator = pd.DataFrame([{
-                'linha': '...',
-                'conteudo': '─' * 50,
-                'posicao': ''
-            }])
-            all_previews.append(separator)
+            all_previews.append(_separator())
     
+    # Um único concat (copia os dados, então o separador nunca é alterado)
+    import pandas as pd
     return pd.concat(all_previews, ignore_index=True)
 
 
+@scan_cached
 def analyze_line_patterns(file_path: str) -> dict:
     """
     Analisa padrões gerais das linhas do arquivo.
     
+    Cacheado por (path, mtime, tamanho): reexecutar a célula não relê o arquivo.
+    
     Returns:
         Dict com estatísticas de padrões encontrados
     """
@@ -251,35 +507,30 @@ def analyze_line_patterns(file_path: str) -> dict:
         'com_link': 0
     }
     
-    timestamp_pattern = re.compile(r'^\[?\d{2}/\d{2}/\d{2}')
-    media_omitted = re.compile(r'(audio|image|video|sticker|GIF|document) omitted')
-    media_attached = re.compile(r'<attached:')
-    url_pattern = re.compile(r'https?://')
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open(file_path, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as f:
         for line in f:
-            stripped = line.strip()
-            
-            if not stripped:
+            # strip() só quando a linha começa com espaço (candidata a vazia)
+            if line[0].isspace() and not line.strip():
                 patterns['vazias'] += 1
                 continue
             
-            if timestamp_pattern.match(line):
+            if _TIMESTAMP_PREFIX_RE.match(line):
                 patterns['com_timestamp'] += 1
             else:
                 patterns['sem_timestamp'] += 1
             
-            if media_omitted.search(line):
+            if ' omitted' in line and _MEDIA_OMITTED_RE.search(line):
                 patterns['com_midia_omitida'] += 1
             
-            if media_attached.search(line):
+            if '<attached:' in line:
                 patterns['com_midia_anexada'] += 1
             
-            if url_pattern.search(line):
+            if '://' in line and _URL_RE.search(line):
                 patterns['com_link'] += 1
             
-            # Emoji: caracteres com ord > 127 (simplificado)
-            if any(ord(c) > 127 for c in line):
+            # Emoji: caracteres com ord > 127 (simplificado; isascii() roda em C,
+            # ~5% do tempo da função: um scanner Numba/Cython não compensaria a dependência)
+            if not line.isascii():
                 patterns['com_emoji'] += 1
     
     return patterns
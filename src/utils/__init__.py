@@ -1,37 +1,45 @@
 """
 Utilitários cross-cutting do projeto.
+
+Os submódulos são importados sob demanda (PEP 562): `import utils` ou
+`from utils._scan_cache import ...` não carregam pandas/numpy até que uma
+função que dependa deles seja pedida.
 """
 
-from .dataframe_helpers import (
-    multi_position_preview_dataframe, 
-    format_file_overview_table,
-    format_density_stats_table
-)
-from .file_helpers import get_file_overview, get_file_density_stats
-from .audit import (
-    audit_transformation, 
-    audit_pipeline, 
-    format_audit_table,
-    format_summary_table,
-    generate_impact_analysis,
-    get_file_stats,
-    format_bytes
-)
-
-__all__ = [
+import importlib
+
+# Nome exportado → submódulo que o define
+_EXPORTS = {
     # DataFrame helpers
-    'multi_position_preview_dataframe',
-    'format_file_overview_table',
-    'format_density_stats_table',
+    'multi_position_preview_dataframe': 'dataframe_helpers',
+    'format_file_overview_table': 'dataframe_helpers',
+    'format_density_stats_table': 'dataframe_helpers',
     # File helpers
-    'get_file_overview',
-    'get_file_density_stats',
+    'get_file_overview': 'file_helpers',
+    'get_file_density_stats': 'file_helpers',
+    'scan_overview': 'file_helpers',
     # Audit helpers
-    'audit_transformation',
-    'audit_pipeline',
-    'format_audit_table',
-    'format_summary_table',
-    'generate_impact_analysis',
-    'get_file_stats',
-    'format_bytes',
-]
\ No newline at end of file
+    'audit_transformation': 'audit',
+    'audit_pipeline': 'audit',
+    'format_audit_table': 'audit',
+    'format_summary_table': 'audit',
+    'generate_impact_analysis': 'audit',
+    'get_file_stats': 'audit',
+    'build_file_stats': 'audit',
+    'format_bytes': 'audit',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
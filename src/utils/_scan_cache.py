@@ -0,0 +1,148 @@
+"""
+Cache de varreduras de arquivo, indexado por (path, st_mtime_ns, st_size).
+
+As funções de profiling/auditoria relêem o mesmo arquivo várias vezes
+(a saída da etapa N é a entrada da etapa N+1, células do notebook são
+reexecutadas...). Enquanto mtime e tamanho não mudam, o resultado é reaproveitado.
+
+Dois níveis:
+    1. Memória: functools.lru_cache (por processo)
+    2. Disco (opcional): PROJECT_ROOT/.cache/scan/{sha1}.json com {version, mtime_ns, size, result}
+       Ativo só quando PROJECT_ROOT está definido; desligue com SCAN_CACHE=0.
+       As duas variáveis são lidas a cada consulta ao disco, não no import: o
+       .env carregado depois (import config) e SCAN_CACHE alterado em runtime valem.
+       `version` identifica o código da função: alterá-la invalida as entradas antigas.
+"""
+
+import os
+import json
+import hashlib
+import inspect
+import functools
+import threading
+from pathlib import Path
+
+
+LRU_MAXSIZE = 256
+
+
+def _disk_cache_dir():
+    """Diretório do cache em disco, ou None se desligado (lido do ambiente agora)."""
+    project_root = os.getenv('PROJECT_ROOT')
+    if not project_root or os.getenv('SCAN_CACHE', '1') == '0':
+        return None
+    return Path(project_root) / '.cache' / 'scan'
+
+
+def _cache_file(cache_dir: Path, func_name: str, abs_path: str, file_path: str) -> Path:
+    """Arquivo JSON do cache em disco para (função, arquivo)."""
+    digest = hashlib.sha1(f"{func_name}\0{abs_path}\0{file_path}".encode('utf-8')).hexdigest()
+    return cache_dir / f"{digest}.json"
+
+
+def _freeze(value):
+    """Listas do JSON voltam como tuplas: o resultado cacheado é compartilhado."""
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _code_fingerprint(code) -> str:
+    """Hash do bytecode da função (e das funções aninhadas), estável entre processos."""
+    digest = hashlib.sha1(code.co_code)
+    digest.update(repr(code.co_names).encode('utf-8'))
+    for const in code.co_consts:
+        # repr() de um code object traz o endereço de memória: entra o hash dele;
+        # a ordem de um frozenset de strings muda com o PYTHONHASHSEED
+        if inspect.iscode(const):
+            text = _code_fingerprint(const)
+        elif isinstance(const, frozenset):
+            text = repr(sorted(map(repr, const)))
+        else:
+            text = repr(const)
+        digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _load_from_disk(cache_file: Path, version: str, mtime_ns: int, size: int):
+    """Lê o resultado do disco se versão/mtime/tamanho baterem; senão None."""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (entry.get('version') != version or entry.get('mtime_ns') != mtime_ns
+            or entry.get('size') != size):
+        return None
+    return _freeze(entry.get('result'))
+
+
+def _save_to_disk(cache_file: Path, version: str, mtime_ns: int, size: int, result) -> None:
+    """Grava o resultado no disco (falhas são ignoradas: o cache é só otimização)."""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            entry = {'version': version, 'mtime_ns': mtime_ns, 'size': size, 'result': result}
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_file, cache_file)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def scan_cached(func=None, *, version: str = ''):
+    """
+    Decorator: memoiza func(file_path) enquanto o arquivo não mudar.
+
+    No disco, a entrada só vale para o mesmo código de func (hash do bytecode).
+    Mudanças só em funções auxiliares que func chama não alteram esse hash:
+    nesse caso, suba `version` (@scan_cached(version='2')).
+
+    A chave inclui o caminho como foi passado (o resultado costuma ecoá-lo)
+    e o caminho absoluto (caminhos relativos dependem do cwd).
+
+    O resultado cacheado é compartilhado entre as chamadas, então func deve
+    devolver valores imutáveis (números, strings, tuplas) ou um dict plano de
+    escalares: dicts saem como cópia rasa (barata), o resto sai sem cópia.
+
+    O arquivo é consultado com um único os.stat() por chamada (ou nenhum, se
+    o chamador já tiver o stat_result). Se func aceitar `stat_result`, recebe
+    esse mesmo objeto em vez de consultar o tamanho de novo.
+    """
+    if func is None:
+        return functools.partial(scan_cached, version=version)
+
+    func_name = f"{func.__module__}.{func.__qualname__}"
+    func_version = f"{version}:{_code_fingerprint(func.__code__)}"
+    wants_stat = 'stat_result' in inspect.signature(func).parameters
+    # stat da chamada corrente, visível para _cached (por thread: o pool de auditoria é concorrente)
+    current = threading.local()
+
+    @functools.lru_cache(maxsize=LRU_MAXSIZE)
+    def _cached(file_path: str, abs_path: str, mtime_ns: int, size: int):
+        cache_dir = _disk_cache_dir()
+        cache_file = _cache_file(cache_dir, func_name, abs_path, file_path) if cache_dir else None
+
+        if cache_file is not None:
+            result = _load_from_disk(cache_file, func_version, mtime_ns, size)
+            if result is not None:
+                return result
+
+        result = func(file_path, stat_result=current.stat) if wants_stat else func(file_path)
+
+        if cache_file is not None:
+            _save_to_disk(cache_file, func_version, mtime_ns, size, result)
+        return result
+
+    @functools.wraps(func)
+    def wrapper(file_path, stat_result: os.stat_result = None):
+        file_path = str(file_path)
+        st = stat_result if stat_result is not None else os.stat(file_path)
+        current.stat = st
+        result = _cached(file_path, os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+        return result.copy() if isinstance(result, dict) else result
+
+    wrapper.cache_clear = _cached.cache_clear
+    wrapper.cache_info = _cached.cache_info
+    return wrapper
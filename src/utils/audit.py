@@ -3,55 +3,72 @@ Funções de auditoria para comparação entre estágios do pipeline.
 """
 
 import os
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+from ._scan_cache import scan_cached
+from .file_helpers import format_bytes, stream_count
 
-def format_bytes(size: int) -> str:
-    """Formata bytes para unidade legível."""
-    if size < 0:
-        return f"-{format_bytes(-size)}"
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024:
-            return f"{size:.2f} {unit}"
-        size /= 1024
-    return f"{size:.2f} TB"
+# pandas/numpy só são carregados pelas funções que montam DataFrames
+# (importar cleaning para listar etapas não paga ~0.5 s de import)
+if TYPE_CHECKING:
+    import pandas as pd
 
+# A partir de quantos arquivos a reler vale abrir um pool de threads
+# (leitura de disco libera o GIL; abaixo disso o overhead não compensa)
+PARALLEL_MIN_FILES = 4
+MAX_AUDIT_WORKERS = 8
 
-def get_file_stats(file_path: str) -> dict:
+
+def build_file_stats(file_path: str, size_bytes: int, total_lines: int, total_chars: int) -> dict:
     """
-    Retorna estatísticas básicas de um arquivo.
+    Monta o dict de estatísticas no formato de get_file_stats().
     
-    Args:
-        file_path: Caminho do arquivo
-        
-    Returns:
-        Dict com path, name, size_bytes, size_formatted, total_lines, total_chars
+    Usado quando as contagens já foram obtidas em streaming (sem reler o arquivo).
     """
     file_path = str(file_path)
-    size_bytes = os.path.getsize(file_path)
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    lines = content.splitlines()
-    total_chars = len(content)
     
     return {
         'path': file_path,
         'name': Path(file_path).name,
         'size_bytes': size_bytes,
         'size_formatted': format_bytes(size_bytes),
-        'total_lines': len(lines),
+        'total_lines': total_lines,
         'total_chars': total_chars
     }
 
 
+@scan_cached
+def get_file_stats(file_path: str, stat_result: os.stat_result = None) -> dict:
+    """
+    Retorna estatísticas básicas de um arquivo.
+    
+    Cacheado por (path, mtime, tamanho): arquivos inalterados não são relidos.
+    
+    Args:
+        file_path: Caminho do arquivo
+        stat_result: os.stat() já feito pelo chamador (evita um novo stat)
+        
+    Returns:
+        Dict com path, name, size_bytes, size_formatted, total_lines, total_chars
+    """
+    file_path = str(file_path)
+    size_bytes = (stat_result or os.stat(file_path)).st_size
+    
+    # Uma passada em blocos: não segura o arquivo inteiro nem a lista de linhas
+    total_lines, total_chars = stream_count(file_path)
+    
+    return build_file_stats(file_path, size_bytes, total_lines, total_chars)
+
+
 def audit_transformation(
     input_file: str, 
     output_file: str, 
     transformation_name: str,
-    show_output: bool = True
+    show_output: bool = True,
+    input_stats: dict = None,
+    output_stats: dict = None
 ) -> dict:
     """
     Audita uma transformação individual entre dois arquivos.
@@ -61,12 +78,14 @@ def audit_transformation(
         output_file: Arquivo de saída
         transformation_name: Nome da transformação realizada
         show_output: Se True, imprime relatório
+        input_stats: Estatísticas já calculadas da entrada (evita reler o arquivo)
+        output_stats: Estatísticas já calculadas da saída (evita reler o arquivo)
         
     Returns:
         Dict com métricas da transformação
     """
-    before = get_file_stats(input_file)
-    after = get_file_stats(output_file)
+    before = input_stats or get_file_stats(input_file)
+    after = output_stats or get_file_stats(output_file)
     
     delta_lines = before['total_lines'] - after['total_lines']
     delta_bytes = before['size_bytes'] - after['size_bytes']
@@ -104,7 +123,9 @@ def audit_pipeline(
     Audita um pipeline completo de transformações.
     
     Args:
-        stages: Lista de dicts com {'file': path, 'name': nome_do_estágio}
+        stages: Lista de dicts com {'file': path, 'name': nome_do_estágio}.
+                Opcionalmente 'stats' (dict de get_file_stats/build_file_stats)
+                para não reler o arquivo.
         show_output: Se True, imprime relatório completo
         
     Returns:
@@ -117,35 +138,48 @@ def audit_pipeline(
         ]
         df_audit, totals = audit_pipeline(stages)
     """
-    # Coleta métricas de cada arquivo
-    stats = [get_file_stats(s['file']) for s in stages]
-    
-    # Monta dados para DataFrame
-    rows = []
-    for i, (stage, stat) in enumerate(zip(stages, stats)):
-        row = {
-            'Estágio': stage['name'],
-            'Arquivo': stat['name'],
-            'Linhas': stat['total_lines'],
-            'Chars': stat['total_chars'],
-            'Tamanho': stat['size_formatted'],
-            'Tamanho_bytes': stat['size_bytes'],
-            'Δ Linhas': 0,
-            'Δ Chars': 0,
-            'Δ Bytes': 0,
-            'Δ %': 0.0
-        }
-        
-        if i > 0:
-            prev = stats[i-1]
-            row['Δ Linhas'] = prev['total_lines'] - stat['total_lines']
-            row['Δ Chars'] = prev['total_chars'] - stat['total_chars']
-            row['Δ Bytes'] = prev['size_bytes'] - stat['size_bytes']
-            row['Δ %'] = (row['Δ Bytes'] / prev['size_bytes'] * 100) if prev['size_bytes'] > 0 else 0
-        
-        rows.append(row)
+    # Coleta métricas de cada arquivo (só relê os estágios sem 'stats')
+    stats = [s.get('stats') for s in stages]
+    missing = [i for i, stat in enumerate(stats) if not stat]
+    missing_files = [stages[i]['file'] for i in missing]
+    
+    if len(missing) >= PARALLEL_MIN_FILES:
+        with ThreadPoolExecutor(max_workers=min(MAX_AUDIT_WORKERS, len(missing))) as ex:
+            computed = list(ex.map(get_file_stats, missing_files))
+    else:
+        computed = [get_file_stats(f) for f in missing_files]
+    
+    for i, stat in zip(missing, computed):
+        stats[i] = stat
+    
+    import numpy as np
+    import pandas as pd
     
-    df = pd.DataFrame(rows)
+    # Colunas como arrays: deltas vetorizados (estágio anterior - atual; 0 no primeiro)
+    lines = np.array([stat['total_lines'] for stat in stats], dtype=np.int64)
+    chars = np.array([stat['total_chars'] for stat in stats], dtype=np.int64)
+    sizes = np.array([stat['size_bytes'] for stat in stats], dtype=np.int64)
+    
+    delta_lines = np.concatenate(([0], -np.diff(lines)))
+    delta_chars = np.concatenate(([0], -np.diff(chars)))
+    delta_bytes = np.concatenate(([0], -np.diff(sizes)))
+    
+    delta_pct = np.zeros(len(stats))
+    np.divide(delta_bytes[1:], sizes[:-1], out=delta_pct[1:], where=sizes[:-1] > 0)
+    delta_pct *= 100
+    
+    df = pd.DataFrame({
+        'Estágio': [stage['name'] for stage in stages],
+        'Arquivo': [stat['name'] for stat in stats],
+        'Linhas': lines,
+        'Chars': chars,
+        'Tamanho': [stat['size_formatted'] for stat in stats],
+        'Tamanho_bytes': sizes,
+        'Δ Linhas': delta_lines,
+        'Δ Chars': delta_chars,
+        'Δ Bytes': delta_bytes,
+        'Δ %': delta_pct
+    })
     
     # Calcula totais
     total_lines = stats[0]['total_lines'] - stats[-1]['total_lines']
@@ -175,10 +209,15 @@ def audit_pipeline(
         print(f"{'Estágio':<42} {'Linhas':>10} {'Chars':>12} {'Tamanho':>10} {'Δ Linhas':>10} {'Δ %':>10}")
         print("-"*105)
         
-        for _, row in df.iterrows():
-            delta_l = f"-{row['Δ Linhas']:,}" if row['Δ Linhas'] > 0 else "-"
-            delta_p = f"-{row['Δ %']:.2f}%" if row['Δ %'] > 0 else "-"
-            print(f"{row['Estágio']:<42} {row['Linhas']:>10,} {row['Chars']:>12,} {row['Tamanho']:>10} {delta_l:>10} {delta_p:>10}")
+        # Direto das colunas já montadas (sem um Series por linha do iterrows)
+        report_rows = zip(
+            df['Estágio'], lines.tolist(), chars.tolist(), df['Tamanho'],
+            delta_lines.tolist(), delta_pct.tolist()
+        )
+        for name, n_lines, n_chars, size, d_lines, d_pct in report_rows:
+            delta_l = f"-{d_lines:,}" if d_lines > 0 else "-"
+            delta_p = f"-{d_pct:.2f}%" if d_pct > 0 else "-"
+            print(f"{name:<42} {n_lines:>10,} {n_chars:>12,} {size:>10} {delta_l:>10} {delta_p:>10}")
         
         print("-"*105)
         print(f"{'🎯 TOTAL REDUZIDO':<42} {f'-{total_lines:,}':>10} {f'-{total_chars:,}':>12} {format_bytes(total_bytes):>10} {'-':>10} {f'-{total_pct:.2f}%':>10}")
@@ -187,7 +226,7 @@ def audit_pipeline(
     return df, totals
 
 
-def format_audit_table(df_audit: pd.DataFrame, include_chars: bool = True) -> pd.DataFrame:
+def format_audit_table(df_audit: 'pd.DataFrame', include_chars: bool = True) -> 'pd.DataFrame':
     """
     Formata DataFrame de auditoria para exibição no Quarto.
     
@@ -215,7 +254,7 @@ def format_audit_table(df_audit: pd.DataFrame, include_chars: bool = True) -> pd
     return df_display
 
 
-def format_summary_table(audits: list) -> pd.DataFrame:
+def format_summary_table(audits: list) -> 'pd.DataFrame':
     """
     Cria tabela de resumo por etapa com headers claros.
     
@@ -225,6 +264,8 @@ def format_summary_table(audits: list) -> pd.DataFrame:
     Returns:
         DataFrame formatado
     """
+    import pandas as pd
+    
     emojis = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟']
     
     data = []
@@ -4,6 +4,11 @@ Funções auxiliares para manipulação de DataFrames.
 
 import pandas as pd
 
+from .file_helpers import count_lines, position_to_line, read_line_windows
+
+# Linha separadora entre posições (montada uma vez, reutilizada)
+_SEPARATOR = pd.DataFrame.from_records([('...', '...', '.........')], columns=['Posição', 'Linha', 'Conteúdo'])
+
 
 def multi_position_preview_dataframe(file_path, n_lines=5, 
                                      positions=[0, 50, 100], 
@@ -25,24 +30,19 @@ def multi_position_preview_dataframe(file_path, n_lines=5,
     """
     dfs = []
     
-    # Lê o arquivo uma vez pra contar linhas
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    total_lines = len(lines)
+    # Total de linhas (cacheado) e só as janelas pedidas, numa passada
+    total_lines = count_lines(file_path)
+    starts = [position_to_line(position, total_lines, n_lines) for position in positions]
+    windows = read_line_windows(file_path, starts, n_lines)
     
-    for i, position in enumerate(positions):
-        # Calcula índice inicial baseado na posição percentual
-        start_idx = int((position / 100) * total_lines)
-        start_idx = max(0, min(start_idx, total_lines - n_lines))
-        
+    for i, (position, start_idx) in enumerate(zip(positions, starts)):
         # Extrai linhas
         position_lines = []
-        for j in range(start_idx, min(start_idx + n_lines, total_lines)):
+        for j, content in enumerate(windows[start_idx], start=start_idx):
             position_lines.append({
                 'Posição': f'{position}%',
                 'Linha': j + 1,
-                'Conteúdo': lines[j].rstrip('\n')
+                'Conteúdo': content
             })
         
         df_position = pd.DataFrame(position_lines)
@@ -50,12 +50,7 @@ def multi_position_preview_dataframe(file_path, n_lines=5,
         
         # Adiciona separador entre posições (exceto após a última)
         if insert_separator and i < len(positions) - 1:
-            separator = pd.DataFrame({
-                'Posição': ['...'],
-                'Linha': ['...'],
-                'Conteúdo': ['.........']
-            })
-            dfs.append(separator)
+            dfs.append(_SEPARATOR)
     
     # Concatena todos os DataFrames
     df_final = pd.concat(dfs, ignore_index=True)
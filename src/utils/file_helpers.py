@@ -3,40 +3,181 @@ Funções auxiliares para análise de arquivos.
 """
 
 import os
-import statistics
+from itertools import islice
+
+from ._scan_cache import scan_cached
+
+# Buffer de leitura para as varreduras em streaming (1 MiB)
+READ_BUFFER_SIZE = 1 << 20
+
+# Quebras reconhecidas por str.splitlines() (no modo texto \r e \r\n viram uma só)
+_LINE_BREAKS = frozenset('\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029')
+# Complemento das quebras de 1 byte: bytes.translate(None, ...) deixa só as quebras
+_NON_BREAK_BYTES = bytes(b for b in range(256) if b not in b'\n\r\x0b\x0c\x1c\x1d\x1e')
+
+# Unidades de format_bytes: (limite exclusivo, divisor, unidade); acima disso é TB
+_BYTE_UNITS = ((1 << 10, 1, 'B'), (1 << 20, 1 << 10, 'KB'), (1 << 30, 1 << 20, 'MB'), (1 << 40, 1 << 30, 'GB'))
 
 
 def format_bytes(size: int) -> str:
-    """Formata bytes para unidade legível."""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024:
-            return f"{size:.2f} {unit}"
-        size /= 1024
-    return f"{size:.2f} TB"
+    """Formata bytes para unidade legível (negativos ganham o sinal na frente)."""
+    if size < 0:
+        return f"-{format_bytes(-size)}"
+    # Compara com limites constantes e divide uma vez só (divisão por 2**k é exata)
+    for limit, scale, unit in _BYTE_UNITS:
+        if size < limit:
+            return f"{size / scale:.2f} {unit}"
+    return f"{size / (1 << 40):.2f} TB"
+
+
+@scan_cached
+def scan_overview(file_path: str, stat_result: os.stat_result = None) -> tuple:
+    """
+    Conta linhas, caracteres e linhas não vazias numa única passada (cacheado).
+    
+    Returns:
+        Tuple (total_linhas, total_caracteres, linhas_nao_vazias)
+    """
+    total_lines = total_chars = non_empty_lines = 0
+    with open(file_path, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as f:
+        for line in f:
+            total_lines += 1
+            total_chars += len(line)
+            if line.strip():
+                non_empty_lines += 1
+    return total_lines, total_chars, non_empty_lines
+
+
+def stream_count(file_path: str) -> tuple:
+    """
+    Conta (linhas, caracteres) em blocos binários, sem materializar o conteúdo.
+    
+    Mesmo resultado de len(content.splitlines()) e len(content) com
+    content = open(file_path, encoding='utf-8').read(), em memória O(bloco).
+    Blocos só-ASCII nem são decodificados; os demais são (o que também valida o UTF-8).
+    """
+    total_lines = total_chars = crlf = 0
+    last_char = ''
+    
+    with open(file_path, 'rb') as f:
+        while block := f.read(READ_BUFFER_SIZE):
+            # Fecha o bloco num byte ASCII que não seja \r: nenhum caractere
+            # multibyte nem par \r\n fica dividido entre dois blocos
+            if block[-1] >= 0x80 or block[-1] == 0x0D:
+                block += f.readline()
+            
+            breaks = block.translate(None, _NON_BREAK_BYTES)
+            total_lines += len(breaks)
+            if b'\r' in breaks:
+                crlf += block.count(b'\r\n')
+            
+            if block.isascii():
+                total_chars += len(block)
+                last_char = chr(block[-1])
+            else:
+                text = block.decode('utf-8')
+                total_chars += len(text)
+                total_lines += text.count('\x85') + text.count('\u2028') + text.count('\u2029')
+                last_char = text[-1]
+    
+    # Cada \r\n foi contado como duas quebras e vira um único '\n' no modo texto
+    total_lines -= crlf
+    total_chars -= crlf
+    
+    # Última linha sem quebra no final também conta
+    if total_chars and last_char not in _LINE_BREAKS:
+        total_lines += 1
+    
+    return total_lines, total_chars
+
+
+@scan_cached
+def _scan_line_count(file_path: str) -> int:
+    """Conta linhas só nos bytes, sem decodificar o texto (cacheado)."""
+    total = 0
+    last_byte = b''
+    
+    with open(file_path, 'rb') as f:
+        while block := f.read(READ_BUFFER_SIZE):
+            # Não separa um \r\n entre dois blocos
+            while block[-1] == 0x0D and (extra := f.read(1)):
+                block += extra
+            
+            total += block.count(b'\n')
+            # No modo texto um \r sozinho também quebra a linha
+            if b'\r' in block:
+                total += block.count(b'\r') - block.count(b'\r\n')
+            last_byte = block[-1:]
+    
+    # Última linha sem quebra no final também conta
+    if last_byte and last_byte not in b'\r\n':
+        total += 1
+    
+    return total
+
+
+def count_lines(file_path: str, stat_result: os.stat_result = None) -> int:
+    """
+    Total de linhas do arquivo (mesma contagem de readlines(); cacheado).
+    
+    stat_result: os.stat() já feito pelo chamador (evita um segundo stat)
+    """
+    return _scan_line_count(file_path, stat_result=stat_result)
+
+
+def position_to_line(position: float, total_lines: int, n: int) -> int:
+    """Índice (0-based) da primeira de n linhas na posição percentual, sem passar do fim."""
+    start_idx = int((position / 100) * total_lines)
+    return max(0, min(start_idx, total_lines - n))
+
+
+def read_line_windows(file_path: str, starts: list, n: int) -> dict:
+    """
+    Lê janelas de n linhas a partir de cada índice em `starts`, numa única passada.
+    
+    Só as linhas pedidas viram str guardada; as demais são consumidas e descartadas,
+    então a memória fica em O(len(starts) * n) em vez do arquivo inteiro.
+    
+    Returns:
+        Dict {start: [linhas sem '\\n']} (janela mais curta se o arquivo acabar antes)
+    """
+    wanted = sorted({i for start in starts for i in range(start, start + n)})
+    found = {}
+    
+    with open(file_path, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as f:
+        pos = 0
+        for idx in wanted:
+            # Pula até a linha idx sem materializar as intermediárias
+            if idx > pos:
+                next(islice(f, idx - pos, idx - pos), None)
+            line = next(f, None)
+            if line is None:
+                break
+            found[idx] = line.rstrip('\n')
+            pos = idx + 1
+    
+    return {
+        start: [found[i] for i in range(start, start + n) if i in found]
+        for start in starts
+    }
 
 
-def get_file_overview(file_path: str) -> dict:
+def get_file_overview(file_path: str, stat_result: os.stat_result = None) -> dict:
     """
     Retorna visão geral do arquivo com metadados básicos.
     
     Args:
         file_path: Caminho do arquivo
+        stat_result: os.stat() já feito pelo chamador (evita um novo stat)
         
     Returns:
         Dict com métricas do arquivo
     """
-    size_bytes = os.path.getsize(file_path)
+    stat_result = stat_result or os.stat(file_path)
+    size_bytes = stat_result.st_size
+    total_lines, total_chars, non_empty_lines = scan_overview(file_path, stat_result=stat_result)
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    total_lines = len(lines)
-    total_chars = sum(len(line) for line in lines)
-    non_empty_lines = sum(1 for line in lines if line.strip())
-    
-    # Estatísticas de comprimento de linha
-    line_lengths = [len(line) for line in lines]
-    avg_line_length = sum(line_lengths) / len(line_lengths) if line_lengths else 0
+    avg_line_length = total_chars / total_lines if total_lines else 0
     
     result = {
         'arquivo': file_path,
@@ -63,6 +204,85 @@ def get_file_overview(file_path: str) -> dict:
     return result
 
 
+def _line_lengths(file_path: str) -> tuple:
+    """
+    Tamanho de cada linha em caracteres e em bytes UTF-8, como arrays numpy.
+    
+    Mesmas linhas de `for line in open(file_path, encoding='utf-8')` (com o '\n',
+    \r\n e \r sozinho tratados como no modo texto), mas medidas sobre os bytes:
+    sem um str por linha nem o encode() de volta para contar bytes.
+    
+    Returns:
+        Tuple (chars por linha, bytes por linha, tamanho do arquivo em bytes)
+    """
+    import numpy as np
+    
+    char_parts, byte_parts = [], []
+    
+    with open(file_path, 'rb') as f:
+        # Tamanho pelo descritor já aberto (sem resolver o caminho de novo)
+        size_bytes = os.fstat(f.fileno()).st_size
+        
+        while block := f.read(READ_BUFFER_SIZE):
+            # Blocos sempre terminam numa linha inteira
+            if block[-1] != 0x0A:
+                block += f.readline()
+            
+            data = np.frombuffer(block, dtype=np.uint8)
+            
+            if b'\r' in block:
+                # Modo texto: \r\n vira '\n' e \r sozinho também quebra a linha
+                is_cr = data == 0x0D
+                crlf = np.zeros_like(is_cr)
+                crlf[:-1] = is_cr[:-1] & (data[1:] == 0x0A)
+                data = data[~crlf]
+                data[data == 0x0D] = 0x0A
+            
+            ends = np.flatnonzero(data == 0x0A) + 1
+            if not len(ends) or ends[-1] != len(data):
+                ends = np.append(ends, len(data))
+            starts = np.concatenate(([0], ends[:-1]))
+            line_bytes = ends - starts
+            
+            if block.isascii():
+                line_chars = line_bytes
+            else:
+                block.decode('utf-8')  # mesma validação (UnicodeDecodeError) da leitura em modo texto
+                # Caracteres = bytes que não são de continuação (10xxxxxx)
+                continuation = np.flatnonzero((data & 0xC0) == 0x80)
+                line_chars = line_bytes - np.diff(np.searchsorted(continuation, ends), prepend=0)
+            
+            # int32 basta para o tamanho de uma linha e guarda metade da memória por linha
+            char_parts.append(line_chars.astype(np.int32))
+            byte_parts.append(line_bytes.astype(np.int32))
+    
+    if not char_parts:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), size_bytes
+    return np.concatenate(char_parts), np.concatenate(byte_parts), size_bytes
+
+
+def _median_mode(values) -> tuple:
+    """
+    (mediana, moda) de tamanhos de linha não negativos, via histograma (sem ordenar).
+    
+    Mesmos valores e tipos de statistics.median() / statistics.mode(): mediana int
+    ou média float dos dois centrais; no empate da moda vence o valor que aparece primeiro.
+    """
+    import numpy as np
+    
+    counts = np.bincount(values)
+    cumulative = np.cumsum(counts)
+    
+    def kth(k):
+        return int(np.searchsorted(cumulative, k, side='right'))
+    
+    n = len(values)
+    mid = n // 2
+    median = kth(mid) if n % 2 else (kth(mid - 1) + kth(mid)) / 2
+    mode = int(values[np.argmax(counts[values] == counts.max())])
+    return median, mode
+
+
 def get_file_density_stats(file_path: str) -> dict:
     """
     Calcula estatísticas de densidade do arquivo.
@@ -73,31 +293,41 @@ def get_file_density_stats(file_path: str) -> dict:
     Returns:
         Dict com estatísticas de densidade
     """
-    line_sizes = []
-    line_bytes = []
+    import numpy as np
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line_sizes.append(len(line))
-            line_bytes.append(len(line.encode('utf-8')))
+    line_sizes, line_bytes, size_bytes = _line_lengths(file_path)
     
     # Metadados básicos
-    size_bytes = os.path.getsize(file_path)
     total_lines = len(line_sizes)
-    total_chars = sum(line_sizes)
+    total_chars = int(line_sizes.sum(dtype=np.int64))
     
-    # Estatísticas de caracteres
-    stats = {
-        'total_caracteres': total_chars,
-        'media_chars_linha': statistics.mean(line_sizes) if line_sizes else 0,
-        'mediana_chars_linha': statistics.median(line_sizes) if line_sizes else 0,
-        'moda_chars_linha': statistics.mode(line_sizes) if line_sizes else 0,
-        'linha_mais_curta': min(line_sizes) if line_sizes else 0,
-        'linha_mais_longa': max(line_sizes) if line_sizes else 0,
-        'media_bytes_linha': size_bytes / total_lines if total_lines > 0 else 0,
-        'mediana_bytes_linha': statistics.median(line_bytes) if line_bytes else 0,
-        'moda_bytes_linha': statistics.mode(line_bytes) if line_bytes else 0,
-    }
+    # Estatísticas de caracteres (mesmos valores e tipos do módulo statistics)
+    if total_lines:
+        median_chars, mode_chars = _median_mode(line_sizes)
+        median_bytes, mode_bytes = _median_mode(line_bytes)
+        stats = {
+            'total_caracteres': total_chars,
+            'media_chars_linha': total_chars // total_lines if total_chars % total_lines == 0 else total_chars / total_lines,
+            'mediana_chars_linha': median_chars,
+            'moda_chars_linha': mode_chars,
+            'linha_mais_curta': int(line_sizes.min()),
+            'linha_mais_longa': int(line_sizes.max()),
+            'media_bytes_linha': size_bytes / total_lines,
+            'mediana_bytes_linha': median_bytes,
+            'moda_bytes_linha': mode_bytes,
+        }
+    else:
+        stats = {
+            'total_caracteres': 0,
+            'media_chars_linha': 0,
+            'mediana_chars_linha': 0,
+            'moda_chars_linha': 0,
+            'linha_mais_curta': 0,
+            'linha_mais_longa': 0,
+            'media_bytes_linha': 0,
+            'mediana_bytes_linha': 0,
+            'moda_bytes_linha': 0,
+        }
     
     # Print formatado
     print("=" * 60)
@@ -15,16 +15,36 @@ Uso:
 
 import re
 import os
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from config import REGEX_COMPILED
+from utils._scan_cache import scan_cached
+from utils.file_helpers import count_lines
 
 
 # =============================================================================
 # FASE 1: PARSING - TXT → DataFrame
 # =============================================================================
 
-def parse_to_dataframe(input_file: Path) -> pd.DataFrame:
+# Cabeçalho de mensagem: mesma condição de REGEX_PATTERNS['mensagem_completa'] numa linha
+_MESSAGE_HEADER = r'\d{2}/\d{2}/\d{2} \d{2}:\d{2}:\d{2} [^\n]+?: '
+
+# Mensagem inteira: cabeçalho + linhas seguintes até o próximo cabeçalho (multilinha)
+_MESSAGE_BLOCK_RE = re.compile(
+    r'^(\d{2}/\d{2}/\d{2}) (\d{2}:\d{2}:\d{2}) (.+?): '
+    r'(.*(?:\n(?!' + _MESSAGE_HEADER + r').*)*)',
+    re.MULTILINE
+)
+
+# Colunas de texto produzidas pelo parsing
+_PARSED_TEXT_COLUMNS = ['data', 'hora', 'remetente', 'conteudo']
+
+
+def parse_to_dataframe(input_file: Path, dtype_backend: str = None) -> pd.DataFrame:
     """
     Converte arquivo TXT limpo em DataFrame estruturado.
     
@@ -33,58 +53,81 @@ def parse_to_dataframe(input_file: Path) -> pd.DataFrame:
     
     Args:
         input_file: Path do arquivo TXT limpo
+        dtype_backend: 'pyarrow' guarda as colunas de texto como string[pyarrow]
+                       (bem menos memória e .str.* nos kernels do Arrow; requer pyarrow).
+                       Default None: object, como o restante do pipeline espera.
         
     Returns:
         DataFrame com colunas: linha_original, data, hora, timestamp, remetente, conteudo
     """
-    message_pattern = r'^(\d{2}/\d{2}/\d{2}) (\d{2}:\d{2}:\d{2}) (.+?): (.*)$'
+    if dtype_backend not in (None, 'pyarrow'):
+        raise ValueError(f"dtype_backend inválido: {dtype_backend!r}. Use None ou 'pyarrow'")
     
-    lines = open(input_file, 'r', encoding='utf-8').readlines()
+    text = Path(input_file).read_text(encoding='utf-8')
     
-    messages = []
-    current_message = None
+    # A quebra final não abre uma linha vazia (como em readlines())
+    if text.endswith('\n'):
+        text = text[:-1]
     
-    for line_num, line in enumerate(lines, start=1):
-        line = line.rstrip('\n')
-        match = re.match(message_pattern, line)
-        
-        if match:
-            # Salva mensagem anterior
-            if current_message:
-                messages.append(current_message)
-            
-            # Nova mensagem
-            current_message = {
-                'linha_original': line_num,
-                'data': match.group(1),
-                'hora': match.group(2),
-                'remetente': match.group(3),
-                'conteudo': match.group(4)
-            }
-        else:
-            # Linha de continuação
-            if current_message:
-                current_message['conteudo'] += '\n' + line
-    
-    # Última mensagem
-    if current_message:
-        messages.append(current_message)
+    # Uma varredura em C: cada match já traz a mensagem com suas linhas de continuação
+    # (linhas antes do primeiro cabeçalho são descartadas)
+    rows = _MESSAGE_BLOCK_RE.findall(text)
+    # Lista de tuplas direto no construtor: medido ~5x mais rápido que transpor
+    # para um dict de colunas (zip(*rows)), que faz a inferência coluna a coluna
+    df = pd.DataFrame(rows, columns=_PARSED_TEXT_COLUMNS)
     
-    df = pd.DataFrame(messages)
+    # Linha de cada cabeçalho no arquivo: as mensagens são contíguas a partir da primeira
+    first = _MESSAGE_BLOCK_RE.search(text)
+    first_line = text.count('\n', 0, first.start()) + 1 if first else 1
+    line_spans = np.fromiter((row[3].count('\n') for row in rows), dtype='int64', count=len(rows)) + 1
+    df.insert(0, 'linha_original', first_line + line_spans.cumsum() - line_spans)
     
     # Cria timestamp datetime
-    df['timestamp'] = pd.to_datetime(
-        df['data'] + ' ' + df['hora'],
-        format='%d/%m/%y %H:%M:%S'
-    )
+    df['timestamp'] = _parse_timestamps(df['data'], df['hora'])
+    
+    if dtype_backend == 'pyarrow':
+        df[_PARSED_TEXT_COLUMNS] = df[_PARSED_TEXT_COLUMNS].astype('string[pyarrow]')
     
     return df
 
 
+def _parse_timestamps(datas: pd.Series, horas: pd.Series) -> pd.Series:
+    """
+    Equivale a pd.to_datetime(datas + ' ' + horas, format='%d/%m/%y %H:%M:%S').
+    
+    Há poucas centenas de datas e no máximo 86.400 horas distintas para milhões de
+    mensagens: cada valor único é convertido uma vez (com a mesma validação de
+    formato) e o resultado é espalhado pelos códigos de pd.factorize.
+    """
+    date_codes, unique_dates = pd.factorize(datas)
+    time_codes, unique_times = pd.factorize(horas)
+    
+    dates = pd.to_datetime(unique_dates, format='%d/%m/%y')
+    times = pd.to_datetime(unique_times, format='%H:%M:%S')
+    offsets = times - times.normalize()
+    
+    return pd.Series(dates.values[date_codes] + offsets.values[time_codes], index=datas.index)
+
+
 # =============================================================================
 # FASE 2: CLASSIFICAÇÃO DE MENSAGENS
 # =============================================================================
 
+# Mídias omitidas, na ordem de prioridade da classificação
+_OMITTED_TYPES = (
+    ('audio omitted', 'audio_omitted'),
+    ('image omitted', 'image_omitted'),
+    ('video omitted', 'video_omitted'),
+    ('video note omitted', 'video_note_omitted'),
+    ('sticker omitted', 'sticker_omitted'),
+    ('gif omitted', 'gif_omitted'),
+    ('document omitted', 'document_omitted'),
+)
+
+# Emoji: qualquer caractere acima de U+1F600 (varredura em C, não por caractere em Python)
+_EMOJI_RE = re.compile('[\U0001F601-\U0010FFFF]')
+
+
 def classify_message_type(content: str) -> str:
     """
     Classifica o tipo de mensagem baseado no conteúdo.
@@ -95,7 +138,10 @@ def classify_message_type(content: str) -> str:
     - audio_attached, image_attached, video_attached, etc.
     - message_deleted, message_edited, voice_call, system_message
     """
-    content_lower = content.lower().strip()
+    # Todos os testes são de substring: strip() não mudaria nenhum resultado.
+    # Cada `in` é uma busca em C de poucos ns em mensagens curtas; juntar as
+    # agulhas numa alternação (re) como pré-filtro foi medido ~1.7x mais lento.
+    content_lower = content.lower()
     
     # Mensagens deletadas/editadas
     if 'this message was deleted' in content_lower:
@@ -113,20 +159,11 @@ def classify_message_type(content: str) -> str:
     if "this message can't be displayed" in content_lower:
         return 'system_message'
     
-    # Mídias omitidas
-    omitted_types = {
-        'audio omitted': 'audio_omitted',
-        'image omitted': 'image_omitted',
-        'video omitted': 'video_omitted',
-        'video note omitted': 'video_note_omitted',
-        'sticker omitted': 'sticker_omitted',
-        'gif omitted': 'gif_omitted',
-        'document omitted': 'document_omitted',
-    }
-    
-    for pattern, msg_type in omitted_types.items():
-        if content_lower == pattern or pattern in content_lower:
-            return msg_type
+    # Mídias omitidas (pré-filtro: a maioria das mensagens não tem " omitted")
+    if ' omitted' in content_lower:
+        for pattern, msg_type in _OMITTED_TYPES:
+            if pattern in content_lower:
+                return msg_type
     
     # Mídias anexadas
     if '<attached:' in content_lower:
@@ -144,20 +181,27 @@ def classify_message_type(content: str) -> str:
             return 'file_attached'
     
     # Texto
-    url_pattern = r'https?://[^\s]+'
-    if re.search(url_pattern, content):
+    if REGEX_COMPILED['url'].search(content):
         return 'text_with_link'
     
     # Emoji (caracteres Unicode > 127, exceto acentos comuns)
-    if any(ord(char) > 0x1F600 for char in content):  # Range de emojis
+    if not content.isascii() and _EMOJI_RE.search(content):
         return 'text_with_emoji'
     
     return 'text_pure'
 
 
-def add_message_classification(df: pd.DataFrame) -> pd.DataFrame:
-    """Adiciona coluna 'tipo_mensagem' ao DataFrame."""
-    df = df.copy()
+def add_message_classification(df: pd.DataFrame, *, copy: bool = True) -> pd.DataFrame:
+    """
+    Adiciona coluna 'tipo_mensagem' ao DataFrame.
+    
+    Com copy=False a coluna é gravada no próprio df (o pipeline, dono do frame, evita a cópia).
+    """
+    if copy:
+        df = df.copy()
+    # Por linha de propósito: com os pré-filtros de classify_message_type, uma
+    # passada é ~10x mais rápida que as ~25 máscaras .str.contains + np.select
+    # necessárias para reproduzir a mesma prioridade de tipos
     df['tipo_mensagem'] = df['conteudo'].apply(classify_message_type)
     return df
 
@@ -166,10 +210,13 @@ def add_message_classification(df: pd.DataFrame) -> pd.DataFrame:
 # FASE 3: INVENTÁRIO E VINCULAÇÃO DE MÍDIA
 # =============================================================================
 
+# Nome do arquivo em "<attached: 00001234-PHOTO-2024-11-28.jpg>"
+_ATTACHED_FILE_RE = re.compile(r'<attached:\s*(.+?)>')
+
+
 def extract_filename_from_content(content: str) -> str:
     """Extrai nome do arquivo de uma mensagem com mídia anexada."""
-    pattern = r'<attached:\s*(.+?)>'
-    match = re.search(pattern, content)
+    match = _ATTACHED_FILE_RE.search(content)
     return match.group(1) if match else None
 
 
@@ -177,16 +224,26 @@ def extract_media_type_from_filename(filename: str) -> str:
     """Extrai tipo de mídia do nome do arquivo (AUDIO, VIDEO, PHOTO, etc.)."""
     if not filename:
         return None
-    parts = filename.split('-')
+    # Só o segundo campo interessa: maxsplit evita quebrar o resto do nome
+    parts = filename.split('-', 2)
     if len(parts) >= 2:
         return parts[1].upper()
     return None
 
 
+# Campos de cada registro de _scan_media_dir(), na ordem das colunas do inventário
+_MEDIA_INVENTORY_COLUMNS = ['filename', 'path', 'extension', 'size_bytes', 'media_type']
+
+
 def inventory_media_files(media_dir: Path) -> pd.DataFrame:
     """
     Lista todos os arquivos de mídia no diretório.
     
+    A listagem é cacheada (memória e .cache/scan) pelo mtime do diretório, que
+    não muda quando um arquivo é regravado no lugar (recompressão, edição):
+    nesse caso size_bytes fica desatualizado até apagar .cache/scan ou rodar
+    um novo processo com SCAN_CACHE=0.
+    
     Args:
         media_dir: Diretório com arquivos de mídia
         
@@ -199,47 +256,80 @@ def inventory_media_files(media_dir: Path) -> pd.DataFrame:
         print(f"⚠️ Diretório não encontrado: {media_dir}")
         return pd.DataFrame()
     
+    records = _scan_media_dir(media_dir)
+    if not records:
+        return pd.DataFrame()
+    return pd.DataFrame(records, columns=_MEDIA_INVENTORY_COLUMNS)
+
+
+@scan_cached
+def _scan_media_dir(media_dir: str) -> tuple:
+    """
+    Registros de inventory_media_files(), cacheados pelo mtime do diretório.
+    
+    O mtime muda quando arquivos entram, saem ou são renomeados; a mídia do
+    export não é regravada no lugar. os.scandir traz o tipo da entrada, então
+    sobra um único stat por arquivo (para o tamanho). Devolve uma tupla de
+    tuplas (ver _MEDIA_INVENTORY_COLUMNS): o cache a compartilha sem copiar.
+    """
     files = []
-    for file_path in media_dir.iterdir():
-        if file_path.is_file():
-            files.append({
-                'filename': file_path.name,
-                'path': str(file_path),
-                'extension': file_path.suffix.lower(),
-                'size_bytes': file_path.stat().st_size,
-                'media_type': extract_media_type_from_filename(file_path.name)
-            })
     
-    return pd.DataFrame(files)
+    # Sequencial de propósito: com o dentry em cache cada stat custa ~2 µs e um
+    # pool de threads (30k arquivos) ficou mais lento; o cache acima já evita a repetição
+    with os.scandir(media_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                name = entry.name
+                # Mesma regra de Path.suffix, sem montar um Path por arquivo
+                dot = name.rfind('.')
+                files.append((
+                    name,
+                    # str(Path('.') / name) é só o nome; nos demais casos == entry.path
+                    name if media_dir == '.' else entry.path,
+                    name[dot:].lower() if 0 < dot < len(name) - 1 else '',
+                    entry.stat().st_size,
+                    extract_media_type_from_filename(name)
+                ))
+    
+    return tuple(files)
 
 
-def link_media_to_messages(df: pd.DataFrame, media_dir: Path) -> pd.DataFrame:
+def link_media_to_messages(df: pd.DataFrame, media_dir: Path, *, copy: bool = True) -> pd.DataFrame:
     """
     Vincula arquivos de mídia às mensagens correspondentes.
     
     Adiciona colunas: arquivo, extensao, tipo_arquivo, arquivo_existe, arquivo_path
+    Com copy=False as colunas são gravadas no próprio df.
     """
-    df = df.copy()
+    if copy:
+        df = df.copy()
+    media_dir = Path(media_dir)
     
-    # Extrai nome do arquivo de mensagens anexadas
-    df['arquivo'] = df['conteudo'].apply(extract_filename_from_content)
+    # Extrai nome do arquivo de mensagens anexadas (uma passada de regex na coluna)
+    arquivo = df['conteudo'].str.extract(_ATTACHED_FILE_RE, expand=False)
+    has_file = arquivo.notna()
+    df['arquivo'] = arquivo.astype(object).where(has_file, None)
     
     # Inventário de arquivos físicos
     df_inventory = inventory_media_files(media_dir)
-    existing_files = set(df_inventory['filename'].values) if not df_inventory.empty else set()
+    # (isin monta sua própria hash table em C: não precisa passar por um set Python)
+    existing_files = df_inventory['filename'] if not df_inventory.empty else []
     
     # Verifica existência
-    df['arquivo_existe'] = df['arquivo'].apply(lambda x: x in existing_files if x else False)
+    df['arquivo_existe'] = has_file & df['arquivo'].isin(existing_files)
     
-    # Extrai metadados
-    df['extensao'] = df['arquivo'].apply(lambda x: Path(x).suffix.lower() if x else None)
-    df['tipo_arquivo'] = df['arquivo'].apply(extract_media_type_from_filename)
+    # Metadados e path: só as linhas com anexo (minoria) passam por Python
+    files = df.loc[has_file, 'arquivo']
+    existing = df.loc[df['arquivo_existe'], 'arquivo']
+    
+    df['extensao'] = None
+    df.loc[has_file, 'extensao'] = [Path(x).suffix.lower() for x in files]
+    df['tipo_arquivo'] = None
+    df.loc[has_file, 'tipo_arquivo'] = [extract_media_type_from_filename(x) for x in files]
     
     # Path completo
-    df['arquivo_path'] = df.apply(
-        lambda row: str(media_dir / row['arquivo']) if row['arquivo_existe'] else None,
-        axis=1
-    )
+    df['arquivo_path'] = None
+    df.loc[df['arquivo_existe'], 'arquivo_path'] = [str(media_dir / x) for x in existing]
     
     return df
 
@@ -260,52 +350,62 @@ def load_transcriptions(transcription_file: Path) -> pd.DataFrame:
     
     df = pd.read_csv(transcription_file)
     
-    # Normaliza nome do arquivo (remove path, mantém só filename)
+    # Normaliza nome do arquivo (remove path, mantém só filename); separa por
+    # barra e barra invertida, então caminhos gravados no Windows também funcionam
     if 'file_path' in df.columns:
-        df['filename'] = df['file_path'].apply(lambda x: Path(x).name if pd.notna(x) else None)
+        df['filename'] = (
+            df['file_path'].astype(object)
+            .str.rsplit('/', n=1).str[-1]
+            .str.rsplit('\\', n=1).str[-1]
+        )
     
     return df
 
 
-def transcribe_media_groq(file_path: str, api_key: str = None) -> dict:
+# Máximo de requisições simultâneas à Groq no lote (I/O bound: a thread espera a rede)
+MAX_TRANSCRIBE_WORKERS = 8
+
+
+def _transcription_error(message: str) -> dict:
+    """Resultado de transcrição com falha (mesmo formato do sucesso)."""
+    return {
+        'transcription': None,
+        'status': 'error',
+        'language': None,
+        'error': message
+    }
+
+
+def _groq_client(api_key: str = None):
     """
-    Transcreve arquivo de áudio/vídeo usando Groq Whisper API.
+    Cria o cliente Groq.
     
-    Args:
-        file_path: Caminho do arquivo
-        api_key: Chave da API Groq (ou usa GROQ_API_KEY do ambiente)
-        
     Returns:
-        Dict com: transcription, status, language, error
-        
-    NOTA: Requer instalação: pip install groq
+        Tupla (cliente, None) ou (None, dict de erro)
     """
     try:
         from groq import Groq
     except ImportError:
-        return {
-            'transcription': None,
-            'status': 'error',
-            'language': None,
-            'error': 'Groq não instalado. Execute: pip install groq'
-        }
+        return None, _transcription_error('Groq não instalado. Execute: pip install groq')
     
     api_key = api_key or os.getenv('GROQ_API_KEY')
     
     if not api_key:
-        return {
-            'transcription': None,
-            'status': 'error',
-            'language': None,
-            'error': 'GROQ_API_KEY não configurada'
-        }
+        return None, _transcription_error('GROQ_API_KEY não configurada')
     
     try:
-        client = Groq(api_key=api_key)
-        
+        return Groq(api_key=api_key), None
+    except Exception as e:
+        return None, _transcription_error(str(e))
+
+
+def _transcribe_with_client(client, file_path: str) -> dict:
+    """Transcreve um arquivo com um cliente Groq já criado."""
+    try:
+        # O handle vai direto na requisição: o áudio não é lido inteiro para a memória
         with open(file_path, 'rb') as audio_file:
             transcription = client.audio.transcriptions.create(
-                file=(Path(file_path).name, audio_file.read()),
+                file=(Path(file_path).name, audio_file),
                 model="whisper-large-v3",
                 response_format="verbose_json"
             )
@@ -318,56 +418,113 @@ def transcribe_media_groq(file_path: str, api_key: str = None) -> dict:
         }
         
     except Exception as e:
-        return {
-            'transcription': None,
-            'status': 'error',
-            'language': None,
-            'error': str(e)
-        }
+        return _transcription_error(str(e))
 
 
-def merge_transcriptions(df: pd.DataFrame, df_transcriptions: pd.DataFrame) -> pd.DataFrame:
+def transcribe_media_groq(file_path: str, api_key: str = None) -> dict:
     """
-    Faz merge das transcrições com o DataFrame de mensagens.
+    Transcreve arquivo de áudio/vídeo usando Groq Whisper API.
     
-    Adiciona: tem_transcricao, transcricao, transcription_status, is_synthetic
+    Args:
+        file_path: Caminho do arquivo
+        api_key: Chave da API Groq (ou usa GROQ_API_KEY do ambiente)
+        
+    Returns:
+        Dict com: transcription, status, language, error
+        
+    NOTA: Requer instalação: pip install groq
     """
-    df = df.copy()
+    client, error = _groq_client(api_key)
+    if error:
+        return error
     
-    if df_transcriptions.empty:
-        df['tem_transcricao'] = False
-        df['transcricao'] = None
-        df['transcription_status'] = None
-        df['is_synthetic'] = False
-        return df
+    return _transcribe_with_client(client, file_path)
+
+
+def transcribe_media_batch(file_paths: list, api_key: str = None,
+                           max_workers: int = MAX_TRANSCRIBE_WORKERS) -> list:
+    """
+    Transcreve vários arquivos com requisições simultâneas à Groq Whisper API.
     
-    # Cria lookup por filename
-    trans_lookup = df_transcriptions.set_index('filename').to_dict('index')
-    
-    def get_transcription_data(arquivo):
-        if not arquivo or arquivo not in trans_lookup:
-            return {
-                'tem_transcricao': False,
-                'transcricao': None,
-                'transcription_status': None,
-                'is_synthetic': False
-            }
+    Um único cliente (e sua conexão) é compartilhado pelas threads; o tempo
+    total fica perto do da requisição mais lenta de cada leva de max_workers,
+    em vez da soma de todas.
+    
+    Args:
+        file_paths: Caminhos dos arquivos
+        api_key: Chave da API Groq (ou usa GROQ_API_KEY do ambiente)
+        max_workers: Máximo de requisições simultâneas
         
-        data = trans_lookup[arquivo]
-        return {
-            'tem_transcricao': True,
-            'transcricao': data.get('transcription'),
-            'transcription_status': data.get('transcription_status'),
-            'is_synthetic': data.get('is_synthetic', False)
-        }
+    Returns:
+        Lista de dicts (transcription, status, language, error), na ordem de file_paths
+        
+    NOTA: Para rate limit e retry em 429, use scripts/transcribe_media.py
+    """
+    file_paths = list(file_paths)
+    if not file_paths:
+        return []
     
-    # Aplica lookup
-    trans_data = df['arquivo'].apply(get_transcription_data)
+    client, error = _groq_client(api_key)
+    if error:
+        return [dict(error) for _ in file_paths]
     
-    df['tem_transcricao'] = trans_data.apply(lambda x: x['tem_transcricao'])
-    df['transcricao'] = trans_data.apply(lambda x: x['transcricao'])
-    df['transcription_status'] = trans_data.apply(lambda x: x['transcription_status'])
-    df['is_synthetic'] = trans_data.apply(lambda x: x['is_synthetic'])
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as ex:
+        return list(ex.map(lambda file_path: _transcribe_with_client(client, file_path), file_paths))
+
+
+# Coluna das transcrições → (coluna no DataFrame de mensagens, valor sem transcrição)
+_TRANSCRIPTION_COLUMNS = {
+    'transcription': ('transcricao', None),
+    'transcription_status': ('transcription_status', None),
+    'is_synthetic': ('is_synthetic', False),
+}
+
+
+def _add_empty_transcriptions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colunas de transcrição sem nenhuma transcrição (grava no próprio df).
+    
+    Mesmos valores e tipos de uma mensagem sem match em merge_transcriptions():
+    bool para as flags, object (None) para os textos.
+    """
+    df['tem_transcricao'] = False
+    for target, default in _TRANSCRIPTION_COLUMNS.values():
+        df[target] = default
+    return df
+
+
+def merge_transcriptions(df: pd.DataFrame, df_transcriptions: pd.DataFrame, *,
+                         copy: bool = True) -> pd.DataFrame:
+    """
+    Faz merge das transcrições com o DataFrame de mensagens.
+    
+    Adiciona: tem_transcricao, transcricao, transcription_status, is_synthetic
+    
+    Com copy=False as colunas são gravadas no próprio df.
+    """
+    if copy:
+        df = df.copy()
+    
+    if df_transcriptions.empty:
+        return _add_empty_transcriptions(df)
+    
+    # Lookup por filename numa única busca em hash: posição da transcrição de
+    # cada mensagem (-1 = sem transcrição)
+    filenames = pd.Index(df_transcriptions['filename'])
+    if not filenames.is_unique:
+        duplicated = filenames[filenames.duplicated()].unique().tolist()
+        raise ValueError(f"Transcrições com filename repetido: {duplicated}")
+    
+    positions = filenames.get_indexer(df['arquivo'])
+    has_file = (df['arquivo'].notna() & (df['arquivo'] != '')).to_numpy()
+    found = has_file & (positions >= 0)
+    
+    df['tem_transcricao'] = found
+    for source, (target, default) in _TRANSCRIPTION_COLUMNS.items():
+        values = np.full(len(df), default, dtype=object)
+        if source in df_transcriptions.columns:
+            values[found] = df_transcriptions[source].to_numpy(dtype=object)[positions[found]]
+        df[target] = pd.Series(values, index=df.index).infer_objects()
     
     return df
 
@@ -376,32 +533,44 @@ def merge_transcriptions(df: pd.DataFrame, df_transcriptions: pd.DataFrame) -> p
 # FASE 5: ENRIQUECIMENTO
 # =============================================================================
 
-def enrich_content(df: pd.DataFrame) -> pd.DataFrame:
+def enrich_content(df: pd.DataFrame, *, copy: bool = True) -> pd.DataFrame:
     """
     Cria coluna 'conteudo_enriquecido' substituindo mídias por transcrições.
     
     Para áudio/vídeo com transcrição:
         [AUDIO TRANSCRITO] {transcrição}
         [Arquivo: filename]
+    
+    Com copy=False a coluna é gravada no próprio df.
     """
-    df = df.copy()
+    if copy:
+        df = df.copy()
     
-    def build_enriched_content(row):
-        # Se não tem transcrição, mantém original
-        if not row.get('tem_transcricao') or pd.isna(row.get('transcricao')):
-            return row['conteudo']
-        
-        tipo = row.get('tipo_arquivo', 'MEDIA')
-        transcricao = row['transcricao']
-        arquivo = row.get('arquivo', '')
-        is_synthetic = row.get('is_synthetic', False)
-        
-        if is_synthetic:
-            return f"[{tipo} TRANSCRITO - ÓRFÃO] {transcricao}\n[Arquivo: {arquivo}]"
-        else:
-            return f"[{tipo} TRANSCRITO] {transcricao}\n[Arquivo: {arquivo}]"
+    # Texto em string[pyarrow] (parse com dtype_backend='pyarrow') continua Arrow
+    text_dtype = df['conteudo'].dtype if isinstance(df['conteudo'].dtype, pd.StringDtype) else object
+    
+    # Sem as colunas de transcrição, nada a substituir: mantém original
+    if 'tem_transcricao' not in df.columns or 'transcricao' not in df.columns:
+        df['conteudo_enriquecido'] = df['conteudo'].astype(text_dtype)
+        return df
     
-    df['conteudo_enriquecido'] = df.apply(build_enriched_content, axis=1)
+    # astype(bool) segue a veracidade do Python (NaN conta como verdadeiro)
+    has_trans = df['tem_transcricao'].astype(bool) & df['transcricao'].notna()
+    
+    tipo = df['tipo_arquivo'].astype(str) if 'tipo_arquivo' in df.columns else 'MEDIA'
+    arquivo = df['arquivo'].astype(str) if 'arquivo' in df.columns else ''
+    if 'is_synthetic' in df.columns:
+        marker = pd.Series(
+            np.where(df['is_synthetic'].astype(bool), ' TRANSCRITO - ÓRFÃO] ', ' TRANSCRITO] '),
+            index=df.index, dtype=object
+        )
+    else:
+        marker = ' TRANSCRITO] '
+    
+    enriched = '[' + tipo + marker + df['transcricao'].astype(str) + '\n[Arquivo: ' + arquivo + ']'
+    df['conteudo_enriquecido'] = (
+        df['conteudo'].astype(object).where(~has_trans, enriched).astype(text_dtype)
+    )
     
     return df
 
@@ -410,14 +579,122 @@ def enrich_content(df: pd.DataFrame) -> pd.DataFrame:
 # FASE 6: EXPORTAÇÃO
 # =============================================================================
 
-def export_to_csv(df: pd.DataFrame, output_path: Path, columns: list = None) -> Path:
-    """Exporta DataFrame para CSV."""
+_NS_PER_SECOND = 10**9
+_NS_PER_DAY = 86_400 * _NS_PER_SECOND
+
+
+def _csv_date_format(frame: pd.DataFrame):
+    """
+    Formato que o to_csv escolheria para as colunas datetime de `frame`.
+    
+    O to_csv decide a cada chamada (só a data se tudo for meia-noite); ao
+    gravar em pedaços, o formato tem que vir do DataFrame inteiro. None se não
+    há datetime ou há frações de segundo (aí fica a escolha do próprio pandas).
+    """
+    cols = [c for c, dtype in frame.dtypes.items() if dtype == 'datetime64[ns]']
+    if not cols:
+        return None
+    
+    values = frame[cols].to_numpy().view('i8').ravel()
+    ns = values[values != np.iinfo('i8').min]
+    if (ns % _NS_PER_SECOND).any():
+        return None
+    return '%Y-%m-%d' if not (ns % _NS_PER_DAY).any() else '%Y-%m-%d %H:%M:%S'
+
+
+def _csv_column(col: pd.Series, date_format: str = None):
+    """
+    Coluna Arrow para o writer CSV do pyarrow, com o texto de célula do to_csv.
+    
+    Direto, o pyarrow escreveria true/false e timestamps com nanossegundos; os
+    casos comuns são convertidos em C, o resto passa por str() como no to_csv.
+    Só o valor de cada célula bate: as aspas continuam sendo as do pyarrow.
+    `date_format` fixa o formato dos timestamps (ver _csv_date_format).
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    
+    dtype = col.dtype
+    
+    if dtype == object and pd.api.types.infer_dtype(col, skipna=True) in ('string', 'empty'):
+        return pa.array(col.to_numpy(), type=pa.string(), from_pandas=True)
+    
+    if isinstance(dtype, pd.StringDtype):
+        return pa.array(col.array)
+    
+    if dtype == bool:
+        return pa.array(np.where(col.to_numpy(), 'True', 'False'))
+    
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+        return pa.array(col.to_numpy())
+    
+    if dtype == 'datetime64[ns]':
+        ns = col.to_numpy().view('i8')[col.notna().to_numpy()]
+        # Segundos inteiros: mesmo formato do to_csv (só a data se tudo for meia-noite)
+        if not (ns % _NS_PER_SECOND).any():
+            fmt = date_format or ('%Y-%m-%d' if not (ns % _NS_PER_DAY).any() else '%Y-%m-%d %H:%M:%S')
+            seconds = pa.array(col, from_pandas=True).cast(pa.timestamp('s'))
+            return pc.strftime(seconds, format=fmt)
+    
+    text = col.astype(str).where(col.notna(), None)
+    return pa.array(text.to_numpy(dtype=object, na_value=None), type=pa.string())
+
+
+def _write_csv(frames, path: Path, engine: str = 'pandas', date_format: str = None) -> None:
+    """
+    Grava CSV (UTF-8, sem índice).
+    
+    `frames` é um DataFrame ou um iterável de pedaços com as mesmas colunas,
+    gravados em sequência (cabeçalho só uma vez). Em pedaços, passe o
+    `date_format` do DataFrame inteiro (_csv_date_format) para os timestamps
+    saírem iguais em todos eles.
+    
+    engine:
+        'pandas' (padrão): to_csv, o formato publicado dos exports
+        'pyarrow': writer C++ do pyarrow, mais rápido, mas o arquivo NÃO é igual
+                   ao do to_csv: cabeçalho e todo texto (inclusive True/False)
+                   saem entre aspas, ~15% maior. Relido com read_csv, dá os
+                   mesmos dados. Sem pyarrow instalado, cai no to_csv.
+    """
+    if engine not in ('pandas', 'pyarrow'):
+        raise ValueError(f"csv_engine inválido: {engine!r}. Use 'pandas' ou 'pyarrow'")
+    
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    
+    if engine == 'pyarrow':
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            engine = 'pandas'
+    
+    if engine == 'pandas':
+        for i, frame in enumerate(frames):
+            frame.to_csv(path, index=False, encoding='utf-8', mode='a' if i else 'w', header=not i,
+                         date_format=date_format)
+        return
+    
+    writer = None
+    try:
+        for frame in frames:
+            columns = [_csv_column(col, date_format) for _, col in frame.items()]
+            table = pa.table(columns, names=[str(name) for name in frame.columns])
+            if writer is None:
+                schema = table.schema
+                writer = pa_csv.CSVWriter(str(path), schema)
+            writer.write_table(table.cast(schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_to_csv(df: pd.DataFrame, output_path: Path, columns: list = None,
+                  csv_engine: str = 'pandas') -> Path:
+    """Exporta DataFrame para CSV (csv_engine: ver _write_csv)."""
     output_path = Path(output_path)
     
-    if columns:
-        df[columns].to_csv(output_path, index=False, encoding='utf-8')
-    else:
-        df.to_csv(output_path, index=False, encoding='utf-8')
+    _write_csv(df[columns] if columns else df, output_path, engine=csv_engine)
     
     return output_path
 
@@ -447,45 +724,86 @@ def export_corpus_files(df: pd.DataFrame, output_dir: Path, use_enriched: bool =
     
     files = {}
     
+    # Linhas montadas uma vez só, por coluna; os arquivos por remetente são fatias delas
+    timestamps = _format_chat_timestamps(df['timestamp'])
+    contents = df[content_col].astype(str)
+    chat_lines = (timestamps + ' ' + df['remetente'].astype(str) + ': ' + contents).to_numpy()
+    content_lines = contents.to_numpy()
+    
     # Chat completo (com timestamp e remetente)
     chat_complete = output_dir / 'chat_complete.txt'
-    with open(chat_complete, 'w', encoding='utf-8') as f:
-        for _, row in df.iterrows():
-            data = row['timestamp'].strftime('%d/%m/%y')
-            hora = row['timestamp'].strftime('%H:%M:%S')
-            f.write(f"{data} {hora} {row['remetente']}: {row[content_col]}\n")
+    _write_lines(chat_complete, chat_lines)
     files['chat_complete'] = chat_complete
     
     # Corpus full (só conteúdo)
     corpus_full = output_dir / 'corpus_full.txt'
-    with open(corpus_full, 'w', encoding='utf-8') as f:
-        for conteudo in df[content_col]:
-            f.write(f"{conteudo}\n")
+    _write_lines(corpus_full, content_lines)
     files['corpus_full'] = corpus_full
     
-    # Por remetente
-    for remetente in df['remetente'].unique():
-        df_rem = df[df['remetente'] == remetente]
-        
+    # Por remetente (na ordem em que aparecem, como unique()); observed=True:
+    # com remetente categórico, categorias sem mensagens não viram arquivos vazios
+    for remetente, positions in df.groupby('remetente', sort=False, observed=True).indices.items():
         # Chat com timestamp
         chat_file = output_dir / f'chat_{remetente.lower()}.txt'
-        with open(chat_file, 'w', encoding='utf-8') as f:
-            for _, row in df_rem.iterrows():
-                data = row['timestamp'].strftime('%d/%m/%y')
-                hora = row['timestamp'].strftime('%H:%M:%S')
-                f.write(f"{data} {hora} {row['remetente']}: {row[content_col]}\n")
+        _write_lines(chat_file, chat_lines[positions])
         files[f'chat_{remetente.lower()}'] = chat_file
         
         # Corpus só conteúdo
         corpus_file = output_dir / f'corpus_{remetente.lower()}.txt'
-        with open(corpus_file, 'w', encoding='utf-8') as f:
-            for conteudo in df_rem[content_col]:
-                f.write(f"{conteudo}\n")
+        _write_lines(corpus_file, content_lines[positions])
         files[f'corpus_{remetente.lower()}'] = corpus_file
     
     return files
 
 
+def _format_chat_timestamps(timestamps: pd.Series) -> pd.Series:
+    """
+    Formata timestamps como 'DD/MM/YY HH:MM:SS' (mesmo texto do strftime).
+    
+    Sem strftime por valor: os campos saem de aritmética de datetime64 e os
+    dígitos são escritos direto num buffer de bytes (~10x mais rápido).
+    Com NaT ou timezone, usa dt.strftime.
+    """
+    values = timestamps.to_numpy()
+    if values.dtype.kind != 'M' or timestamps.isna().any():
+        return timestamps.dt.strftime('%d/%m/%y %H:%M:%S')
+    
+    days = values.astype('M8[D]')
+    months = values.astype('M8[M]')
+    years = values.astype('M8[Y]')
+    seconds = (values - days).astype('m8[s]').astype(np.int64)
+    fields = (
+        (days - months).astype(np.int64) + 1,
+        (months - years).astype(np.int64) + 1,
+        (years.astype(np.int64) + 1970) % 100,
+        seconds // 3600,
+        seconds // 60 % 60,
+        seconds % 60,
+    )
+    
+    # Cada campo ocupa 2 dígitos + separador: DD/MM/YY HH:MM:SS
+    buffer = np.empty((len(values), 17), dtype=np.uint8)
+    for i, field in enumerate(fields):
+        buffer[:, 3 * i] = ord('0') + field // 10
+        buffer[:, 3 * i + 1] = ord('0') + field % 10
+    buffer[:, [2, 5]] = ord('/')
+    buffer[:, 8] = ord(' ')
+    buffer[:, [11, 14]] = ord(':')
+    
+    text = buffer.view('S17').ravel().astype(str).astype(object)
+    return pd.Series(text, index=timestamps.index)
+
+
+def _write_lines(path: Path, lines) -> None:
+    """Grava as linhas (cada uma terminada em '\\n') num único join."""
+    with open(path, 'w', encoding='utf-8') as f:
+        if len(lines):
+            # A quebra final vai num write à parte: concatenar ao join copiaria
+            # o texto inteiro do arquivo só para acrescentar um caractere
+            f.write('\n'.join(lines.tolist()))
+            f.write('\n')
+
+
 # =============================================================================
 # COLUNAS PARA EXPORTAÇÃO
 # =============================================================================
@@ -532,11 +850,52 @@ COLUMNS_MINIMAL = [
 ]
 
 
+# Compressão do parquet: zstd fica ~2.5x menor que o snappy padrão no corpus,
+# com o mesmo tempo de escrita e leitura
+PARQUET_COMPRESSION = 'zstd'
+PARQUET_COMPRESSION_LEVEL = 3
+
+
+def _write_parquet(frames, path: Path, schema=None) -> None:
+    """
+    Grava parquet (sem índice) comprimido com PARQUET_COMPRESSION.
+    
+    `frames` é um DataFrame ou um iterável de pedaços com as mesmas colunas;
+    cada pedaço vira um row group, sem juntar tudo em memória. `schema` (pyarrow)
+    fixa os tipos de todos os pedaços; sem ele, vale o do primeiro.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    
+    writer = None
+    try:
+        for frame in frames:
+            # nthreads fica no padrão: o pyarrow já converte as colunas em paralelo
+            # (pa.cpu_count() threads) quando há mais de 100 linhas por coluna;
+            # forçar threads em frames pequenos só acrescenta overhead
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    path, schema or table.schema,
+                    compression=PARQUET_COMPRESSION,
+                    compression_level=PARQUET_COMPRESSION_LEVEL
+                )
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
 def export_optimized(
     df: pd.DataFrame, 
     output_dir: Path, 
     formats: list = None,
-    show_progress: bool = True
+    show_progress: bool = True,
+    chunksize: int = None,
+    csv_engine: str = 'pandas'
 ) -> dict:
     """
     Exporta DataFrame em múltiplos formatos otimizados.
@@ -547,6 +906,11 @@ def export_optimized(
         formats: Lista de formatos. Default: ['csv_full', 'csv_core', 'parquet']
                  Opções: 'csv_full', 'csv_core', 'csv_minimal', 'parquet', 'parquet_minimal'
         show_progress: Se True, imprime progresso
+        chunksize: Se definido, grava em pedaços de até `chunksize` linhas: as cópias
+                   (seleção de colunas, tipos otimizados) ficam do tamanho do pedaço,
+                   não do DataFrame inteiro
+        csv_engine: 'pandas' (padrão, to_csv) ou 'pyarrow' (mais rápido, mas põe
+                    aspas em todo texto: o CSV muda, ver _write_csv)
         
     Returns:
         Dict com paths e tamanhos dos arquivos gerados
@@ -607,6 +971,40 @@ def export_optimized(
     def filter_columns(columns):
         return [c for c in columns if c in df.columns]
     
+    # Tipos otimizados convertidos uma vez só (COLUMNS_MINIMAL ⊂ COLUMNS_CORE);
+    # cada parquet usa uma fatia
+    df_opt_core = None
+    
+    def optimized(columns):
+        nonlocal df_opt_core
+        if df_opt_core is None:
+            df_opt_core = optimize_dtypes(df[filter_columns(COLUMNS_CORE)])
+        return df_opt_core[columns]
+    
+    # Pedaços a gravar: o DataFrame inteiro ou fatias de chunksize linhas
+    # (um pedaço vazio quando df não tem linhas, para o arquivo ter cabeçalho/schema)
+    def chunks(columns, optimize=False):
+        if not chunksize:
+            yield optimized(columns) if optimize else df[columns]
+            return
+        for start in range(0, max(len(df), 1), chunksize):
+            chunk = df.iloc[start:start + chunksize][columns]
+            yield optimize_dtypes(chunk) if optimize else chunk
+    
+    # Formato dos timestamps no CSV em pedaços: decidido uma vez, no DataFrame inteiro
+    def csv_date_format(columns):
+        return _csv_date_format(df[columns]) if chunksize else None
+    
+    # Schema do parquet em pedaços: vem de uma linha com valor de cada coluna
+    # (uma coluna toda nula no primeiro pedaço viraria tipo null no Arrow)
+    def parquet_schema(columns):
+        if not chunksize:
+            return None
+        import pyarrow as pa
+        rows = sorted({int(df[c].notna().to_numpy().argmax()) for c in columns}) if len(df) else []
+        sample = optimize_dtypes(df.iloc[rows][columns])
+        return pa.Schema.from_pandas(sample, preserve_index=False)
+    
     for fmt in formats:
         # Pula parquet se não tiver pyarrow
         if 'parquet' in fmt and not parquet_available:
@@ -615,29 +1013,27 @@ def export_optimized(
         if fmt == 'csv_full':
             path = output_dir / 'messages_full.csv'
             cols = filter_columns(COLUMNS_FULL)
-            df[cols].to_csv(path, index=False, encoding='utf-8')
+            _write_csv(chunks(cols), path, engine=csv_engine, date_format=csv_date_format(cols))
             
         elif fmt == 'csv_core':
             path = output_dir / 'messages.csv'
             cols = filter_columns(COLUMNS_CORE)
-            df[cols].to_csv(path, index=False, encoding='utf-8')
+            _write_csv(chunks(cols), path, engine=csv_engine, date_format=csv_date_format(cols))
             
         elif fmt == 'csv_minimal':
             path = output_dir / 'messages_minimal.csv'
             cols = filter_columns(COLUMNS_MINIMAL)
-            df[cols].to_csv(path, index=False, encoding='utf-8')
+            _write_csv(chunks(cols), path, engine=csv_engine, date_format=csv_date_format(cols))
             
         elif fmt == 'parquet':
             path = output_dir / 'messages.parquet'
             cols = filter_columns(COLUMNS_CORE)
-            df_opt = optimize_dtypes(df[cols])
-            df_opt.to_parquet(path, index=False, engine='pyarrow')
+            _write_parquet(chunks(cols, optimize=True), path, schema=parquet_schema(cols))
             
         elif fmt == 'parquet_minimal':
             path = output_dir / 'messages_minimal.parquet'
             cols = filter_columns(COLUMNS_MINIMAL)
-            df_opt = optimize_dtypes(df[cols])
-            df_opt.to_parquet(path, index=False, engine='pyarrow')
+            _write_parquet(chunks(cols, optimize=True), path, schema=parquet_schema(cols))
         
         else:
             continue
@@ -749,7 +1145,8 @@ def run_wrangling_pipeline(
     output_dir: Path,
     media_dir: Path = None,
     transcription_file: Path = None,
-    show_progress: bool = True
+    show_progress: bool = True,
+    dtype_backend: str = None
 ) -> dict:
     """
     Executa pipeline de wrangling na ordem especificada.
@@ -762,6 +1159,9 @@ def run_wrangling_pipeline(
         media_dir: Path do diretório com arquivos de mídia
         transcription_file: Path do CSV com transcrições existentes
         show_progress: Se True, imprime progresso
+        dtype_backend: 'pyarrow' mantém as colunas de texto (conteudo,
+                       conteudo_enriquecido...) como string[pyarrow] do parse
+                       ao export; ver parse_to_dataframe()
         
     Returns:
         Dict com:
@@ -779,6 +1179,9 @@ def run_wrangling_pipeline(
     
     df = None
     outputs = {}
+    # Contagens calculadas em cada etapa, logo depois dela: cada uma lê uma coluna
+    # diferente (juntar num df.agg no fim não economiza passadas) e o progresso
+    # mostra o número da etapa. Medido: ~50 ms no total para 315k mensagens
     stats = {}
     
     if show_progress:
@@ -793,21 +1196,22 @@ def run_wrangling_pipeline(
         
         # Executa etapa
         if step_id == 'parse':
-            df = parse_to_dataframe(input_file)
-            stats['total_linhas_txt'] = sum(1 for _ in open(input_file, 'r', encoding='utf-8'))
+            df = parse_to_dataframe(input_file, dtype_backend=dtype_backend)
+            stats['total_linhas_txt'] = count_lines(input_file)
             stats['total_mensagens'] = len(df)
             if show_progress:
                 print(f"✅ ({stats['total_mensagens']:,} mensagens)")
         
         elif step_id == 'classify':
-            df = add_message_classification(df)
+            df = add_message_classification(df, copy=False)
             stats['tipos_mensagem'] = df['tipo_mensagem'].value_counts().to_dict()
             if show_progress:
-                print(f"✅ ({df['tipo_mensagem'].nunique()} tipos)")
+                # Número de tipos = tamanho da contagem (sem outra passada com nunique)
+                print(f"✅ ({len(stats['tipos_mensagem'])} tipos)")
         
         elif step_id == 'media':
             if media_dir:
-                df = link_media_to_messages(df, Path(media_dir))
+                df = link_media_to_messages(df, Path(media_dir), copy=False)
                 stats['midias_anexadas'] = df['arquivo'].notna().sum()
                 stats['midias_existentes'] = df['arquivo_existe'].sum()
                 if show_progress:
@@ -823,7 +1227,7 @@ def run_wrangling_pipeline(
                 if trans_path.exists():
                     # Arquivo existe — carrega e faz merge
                     df_trans = load_transcriptions(trans_path)
-                    df = merge_transcriptions(df, df_trans)
+                    df = merge_transcriptions(df, df_trans, copy=False)
                     stats['com_transcricao'] = df['tem_transcricao'].sum()
                     if show_progress:
                         print(f"✅ ({stats['com_transcricao']:,} transcrições)")
@@ -840,21 +1244,15 @@ def run_wrangling_pipeline(
                         print(f"   Esperado em: {trans_path}\n")
                     
                     # Continua sem transcrições
-                    df['tem_transcricao'] = False
-                    df['transcricao'] = None
-                    df['transcription_status'] = None
-                    df['is_synthetic'] = False
+                    df = _add_empty_transcriptions(df)
                     stats['com_transcricao'] = 0
             else:
-                df['tem_transcricao'] = False
-                df['transcricao'] = None
-                df['transcription_status'] = None
-                df['is_synthetic'] = False
+                df = _add_empty_transcriptions(df)
                 if show_progress:
                     print("⏭️ (sem arquivo de transcrições)")
         
         elif step_id == 'enrich':
-            df = enrich_content(df)
+            df = enrich_content(df, copy=False)
             stats['mensagens_enriquecidas'] = (df['conteudo'] != df['conteudo_enriquecido']).sum()
             if show_progress:
                 print(f"✅ ({stats['mensagens_enriquecidas']:,} enriquecidas)")